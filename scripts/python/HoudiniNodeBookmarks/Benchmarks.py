@@ -0,0 +1,135 @@
+# MIT License
+#
+# Copyright (c) 2017-2020 Guillaume Jobst, www.cgtoolbox.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+""" Benchmarks, to be run from Houdini's python shell:
+
+    from HoudiniNodeBookmarks import Benchmarks
+    Benchmarks.row_construction(count=500)
+"""
+
+import os
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None  # py2, only QObjects are counted
+
+import hou
+from PySide2 import QtWidgets
+from PySide2 import QtCore
+
+from HoudiniNodeBookmarks import NodeBookmarks
+from HoudiniNodeBookmarks.BookmarkStore import BookmarkStore
+from HoudiniNodeBookmarks.BookmarkStore import BookmarkRecord
+from HoudiniNodeBookmarks.BookmarkStore import make_uid
+from HoudiniNodeBookmarks.BookmarkStore import BOOKMARK, SEPARATOR
+
+def build_row_menu(row):
+    """ Right click menu as it was built by each row before the view's
+        menu was shared.
+    """
+
+    menu = QtWidgets.QMenu(row)
+    menu.setStyleSheet(hou.ui.qtStyleSheet())
+
+    for a in NodeBookmarks.BookmarkViewBase.CONTEXT_MENU_ACTIONS[BOOKMARK]:
+        if a is None:
+            menu.addSeparator()
+            continue
+        ico, label, _ = a
+        icon = hou.ui.createQtIcon("HoudiniNodeBookmarks" + os.sep + ico)
+        menu.addAction(QtWidgets.QAction(icon, label, row))
+
+    return menu
+
+def _records(count, node):
+
+    records = []
+    for i in range(count):
+        if i % 20 == 0:
+            records.append(BookmarkRecord(SEPARATOR, "separator"))
+            continue
+        records.append(BookmarkRecord(BOOKMARK, node.name(),
+                                      uid=make_uid(node.path()),
+                                      node_path=node.path(),
+                                      session_id=node.sessionId(),
+                                      color=[60, 70, 140],
+                                      text_color=[203, 203, 203]))
+    return records
+
+def _build_rows(count, node, row_menus):
+
+    store = BookmarkStore()
+    view = NodeBookmarks.BookmarkView(None, store=store)
+    records = _records(count, node)
+
+    if tracemalloc is not None:
+        tracemalloc.start()
+
+    t = time.time()
+    for r in records:
+        store.insert(r)
+        if row_menus:
+            build_row_menu(view.widgets[r.key])
+    elapsed = time.time() - t
+
+    memory = None
+    if tracemalloc is not None:
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+    objects = len(view.findChildren(QtCore.QObject))
+
+    view.release()
+    view.setParent(None)
+    view.deleteLater()
+
+    return elapsed, objects, memory
+
+def row_construction(count=500, node_path="/obj"):
+    """ Build count rows of the widget view with a menu per row ( as
+        before ) and with the view's shared menu, prints the time, the
+        QObjects and the python memory per row.
+    """
+
+    node = hou.node(node_path)
+    if node is None:
+        raise ValueError("Invalid node: " + node_path)
+
+    results = {}
+    for name, row_menus in (("per row menu", True),
+                            ("shared menu", False)):
+        results[name] = _build_rows(count, node, row_menus)
+
+    print("Row construction, {} rows:".format(count))
+    for name in ("per row menu", "shared menu"):
+        elapsed, objects, memory = results[name]
+        msg = "    {:<14} {:8.3f} ms/row {:8.1f} QObjects/row".format(name,
+                                                                     elapsed * 1000.0 / count,
+                                                                     float(objects) / count)
+        if memory is not None:
+            msg += " {:8.2f} KB/row (python)".format(memory / 1024.0 / count)
+        print(msg)
+
+    return results
@@ -0,0 +1,545 @@
+# MIT License
+#
+# Copyright (c) 2017-2020 Guillaume Jobst, www.cgtoolbox.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+""" Headless bookmarks model.
+
+    The store holds the ordered list of bookmarks and separators shown in
+    a bookmark view, with indexes by uid, node session id and node path.
+    It doesn't import hou or Qt so it can be used ( and tested ) outside
+    of Houdini, the UI renders from it and listens to its changes.
+"""
+
+import hashlib
+
+from HoudiniNodeBookmarks.PathIndex import NodePathTrie
+
+BOOKMARK = "bookmark"
+SEPARATOR = "separator"
+
+DEFAULT_TEXT_COLOR = [203, 203, 203]
+
+def make_uid(node_path):
+    """ Bookmark uid, sha1 of the node path at creation time.
+    """
+
+    return hashlib.sha1(node_path.encode("utf-8")).hexdigest()
+
+class BookmarkRecord(object):
+
+    __slots__ = ("key", "kind", "name", "uid", "node_path",
+                 "session_id", "color", "text_color", "fingerprint")
+
+    def __init__(self, kind, name, uid=None, node_path=None,
+                 session_id=None, color=None, text_color=None,
+                 fingerprint=None):
+
+        self.key = None
+        self.kind = kind
+        self.name = name
+        self.uid = uid
+        self.node_path = node_path
+        self.session_id = session_id
+        self.color = color
+        self.text_color = text_color
+        # [node type, parent type, node name], finds the node back when
+        # its path and session id are no longer valid
+        self.fingerprint = fingerprint
+
+    def __repr__(self):
+
+        return "<BookmarkRecord {} {} '{}'>".format(self.key, self.kind,
+                                                    self.name)
+
+    @property
+    def is_separator(self):
+
+        return self.kind == SEPARATOR
+
+    @property
+    def node_name(self):
+
+        if not self.node_path:
+            return ""
+        return self.node_path.rsplit('/', 1)[-1]
+
+    def data(self, position=-1):
+        """ Serializable dict, same format as the .bkm files and hip data.
+        """
+
+        if self.is_separator:
+            return {"type":SEPARATOR,
+                    "name":self.name,
+                    "id":position}
+
+        return {"type":BOOKMARK,
+                "name":self.name,
+                "node_path":self.node_path,
+                "color":self.color,
+                "text_color":self.text_color,
+                "id":position,
+                "session_id":self.session_id,
+                "fingerprint":self.fingerprint,
+                "uid":self.uid}
+
+    @classmethod
+    def from_data(cls, data):
+        """ Build a record from a .bkm / hip data entry, returns None
+            if the entry type is invalid.
+        """
+
+        kind = data.get("type")
+
+        if kind == SEPARATOR:
+            return cls(SEPARATOR, data.get("name", "INVALID"))
+
+        if kind == BOOKMARK:
+            node_path = data.get("node_path", "/obj")
+            return cls(BOOKMARK, data.get("name", "INVALID"),
+                       uid=data.get("uid") or make_uid(node_path),
+                       node_path=node_path,
+                       session_id=data.get("session_id"),
+                       color=data.get("color"),
+                       text_color=data.get("text_color"),
+                       fingerprint=data.get("fingerprint"))
+
+        return None
+
+class BookmarkStore(object):
+    """ Ordered bookmark and separator records.
+
+        Records get a stable integer key when inserted. Lookups by key,
+        uid, session id and node path are dict lookups, the position of a
+        record is cached and only recomputed after a structural change.
+        Node paths are also kept in a prefix tree to get the bookmarks
+        located under a given node.
+
+        Sections are indexed too: each separator key maps to the ordered
+        keys of the bookmarks following it ( None for the bookmarks placed
+        before the first separator ). The index is updated on insert,
+        remove and move at the cost of the sections involved.
+
+        Listeners are called as listener(op, key, info) with op one of:
+        "insert", "remove", "move", "update" or "clear". Batches send one
+        "insert_many" ( info: keys, position ) or "remove_many" ( info:
+        removed, a list of ( position, record ) in ascending order, the
+        positions being the ones before the removal ), key is None.
+    """
+
+    INDEXED_FIELDS = ("uid", "session_id", "node_path")
+
+    def __init__(self):
+
+        self._records = {}
+        self._order = []
+        self._positions = None
+        self._next_key = 1
+        self._bookmark_count = 0
+        self._indexes = dict((f, {}) for f in self.INDEXED_FIELDS)
+        self._path_trie = NodePathTrie()
+        self._sections = {None:[]}
+        self._section_owner = {}
+        self._listeners = []
+
+    def __len__(self):
+
+        return len(self._order)
+
+    def __iter__(self):
+
+        records = self._records
+        for k in list(self._order):
+            yield records[k]
+
+    def __contains__(self, key):
+
+        return key in self._records
+
+    # listeners
+
+    def subscribe(self, listener):
+
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, op, key, **info):
+
+        # a failing listener doesn't stop the others
+        for listener in list(self._listeners):
+            try:
+                listener(op, key, info)
+            except Exception as e:
+                print("Store listener error, {}: {}".format(op, e))
+
+    # indexes
+
+    def _index(self, record, fields=INDEXED_FIELDS):
+
+        for field in fields:
+            value = getattr(record, field)
+            if value is None: continue
+            self._indexes[field].setdefault(value, []).append(record.key)
+            if field == "node_path":
+                self._path_trie.add(value, record.key)
+
+    def _unindex(self, record, fields=INDEXED_FIELDS):
+
+        for field in fields:
+            value = getattr(record, field)
+            if value is None: continue
+            if field == "node_path":
+                self._path_trie.remove(value, record.key)
+            keys = self._indexes[field].get(value)
+            if not keys: continue
+            if record.key in keys:
+                keys.remove(record.key)
+            if not keys:
+                del(self._indexes[field][value])
+
+    def _find_all(self, field, value):
+
+        return [self._records[k] for k in self._indexes[field].get(value, [])]
+
+    def _find(self, field, value):
+
+        keys = self._indexes[field].get(value)
+        if not keys:
+            return None
+        return self._records[keys[0]]
+
+    def find_by_uid(self, uid):
+
+        return self._find("uid", uid)
+
+    def find_by_session_id(self, session_id):
+
+        return self._find("session_id", session_id)
+
+    def find_by_path(self, node_path):
+
+        return self._find("node_path", node_path)
+
+    def find_all_by_uid(self, uid):
+
+        return self._find_all("uid", uid)
+
+    def find_all_by_session_id(self, session_id):
+
+        return self._find_all("session_id", session_id)
+
+    def find_all_by_path(self, node_path):
+
+        return self._find_all("node_path", node_path)
+
+    def find_under_path(self, node_path):
+        """ Bookmarks located anywhere under the given node, in order.
+        """
+
+        keys = self._path_trie.descendants(node_path)
+        if len(keys) > 1:
+            keys.sort(key=self.index_of)
+        return [self._records[k] for k in keys]
+
+    # sections
+
+    def _previous_separator(self, position):
+        """ Walks back from the given position to the closest separator,
+            returns its key ( or None ) and the number of bookmarks walked.
+        """
+
+        records = self._records
+        order = self._order
+        count = 0
+        for i in range(position, -1, -1):
+            r = records[order[i]]
+            if r.is_separator:
+                return r.key, count
+            count += 1
+        return None, count
+
+    def _section_add(self, records, position):
+        """ Index a block of records already placed from the given position.
+        """
+
+        owner, offset = self._previous_separator(position - 1)
+        keys = self._sections[owner]
+        tail = keys[offset:]
+        del(keys[offset:])
+
+        for record in records:
+            if record.is_separator:
+                owner = record.key
+                keys = self._sections[owner] = []
+            else:
+                keys.append(record.key)
+                self._section_owner[record.key] = owner
+
+        # a new separator takes the end of the section it is dropped in
+        if tail and owner != self._section_owner[tail[0]]:
+            for k in tail:
+                self._section_owner[k] = owner
+        keys.extend(tail)
+
+    def _section_discard(self, record, position):
+        """ Unindex a record still placed at the given position.
+        """
+
+        if not record.is_separator:
+            owner = self._section_owner.pop(record.key)
+            self._sections[owner].remove(record.key)
+            return
+
+        # the children of a removed separator go to the previous section
+        children = self._sections.pop(record.key)
+        if not children:
+            return
+        owner, _ = self._previous_separator(position - 1)
+        self._sections[owner].extend(children)
+        for k in children:
+            self._section_owner[k] = owner
+
+    # positions
+
+    def _invalidate(self):
+
+        self._positions = None
+
+    def index_of(self, key):
+
+        if self._positions is None:
+            self._positions = dict((k, i) for i, k in enumerate(self._order))
+        return self._positions[key]
+
+    def get(self, key):
+
+        return self._records.get(key)
+
+    def at(self, position):
+
+        return self._records[self._order[position]]
+
+    def keys(self):
+
+        return list(self._order)
+
+    def bookmarks(self):
+
+        return [r for r in self if not r.is_separator]
+
+    def separators(self):
+
+        return [r for r in self if r.is_separator]
+
+    def has_bookmarks(self):
+
+        return self._bookmark_count > 0
+
+    def section(self, key):
+        """ Records following the given separator, up to the next one.
+        """
+
+        records = self._records
+        return [records[k] for k in self._sections.get(key, [])]
+
+    def section_size(self, key):
+
+        return len(self._sections.get(key, []))
+
+    def section_of(self, key):
+        """ Separator record the given record belongs to, or None.
+        """
+
+        if key in self._sections:
+            # a separator doesn't belong to a section
+            return None
+        return self._records.get(self._section_owner.get(key))
+
+    # mutations
+
+    def insert(self, record, position=None):
+        """ Insert a record at the given position ( appended if None ),
+            returns the record with its key set.
+        """
+
+        if position is None or position < 0 or position > len(self._order):
+            position = len(self._order)
+
+        record.key = self._next_key
+        self._next_key += 1
+
+        self._records[record.key] = record
+        self._order.insert(position, record.key)
+        self._index(record)
+        self._section_add([record], position)
+        if not record.is_separator:
+            self._bookmark_count += 1
+        self._invalidate()
+
+        self._notify("insert", record.key, position=position)
+        return record
+
+    def insert_many(self, records, position=None):
+        """ Insert a block of records at the given position ( appended if
+            None ) with a single notification, returns the records.
+        """
+
+        if not records:
+            return []
+
+        if position is None or position < 0 or position > len(self._order):
+            position = len(self._order)
+
+        keys = []
+        for record in records:
+            record.key = self._next_key
+            self._next_key += 1
+            keys.append(record.key)
+
+            self._records[record.key] = record
+            self._index(record)
+            if not record.is_separator:
+                self._bookmark_count += 1
+
+        self._order[position:position] = keys
+        self._section_add(records, position)
+        self._invalidate()
+
+        self._notify("insert_many", None, keys=keys, position=position)
+        return records
+
+    def remove_many(self, keys):
+        """ Remove several records with a single notification, returns
+            the removed records in their former order.
+        """
+
+        removed = sorted((self.index_of(k), self._records[k]) \
+                         for k in set(keys) if k in self._records)
+        if not removed:
+            return []
+
+        # from the end so the positions left to unindex stay valid
+        for position, record in reversed(removed):
+            self._section_discard(record, position)
+            del(self._records[record.key])
+            self._unindex(record)
+            if not record.is_separator:
+                self._bookmark_count -= 1
+
+        records = self._records
+        self._order = [k for k in self._order if k in records]
+        self._invalidate()
+
+        self._notify("remove_many", None, removed=removed)
+        return [r for _, r in removed]
+
+    def remove(self, key):
+
+        record = self._records.get(key)
+        if record is None:
+            return None
+
+        position = self.index_of(key)
+        self._section_discard(record, position)
+        del(self._order[position])
+        del(self._records[key])
+        self._unindex(record)
+        if not record.is_separator:
+            self._bookmark_count -= 1
+        self._invalidate()
+
+        self._notify("remove", key, position=position, record=record)
+        return record
+
+    def move(self, key, position):
+        """ Move a record to the given slot, position is expressed before
+            the record is removed from its current place ( drop slot ).
+            Returns the new position.
+        """
+
+        old = self.index_of(key)
+        if position is None or position > len(self._order):
+            position = len(self._order)
+
+        new = position - 1 if position > old else position
+        if new == old:
+            return old
+
+        record = self._records[key]
+        self._section_discard(record, old)
+        del(self._order[old])
+        self._order.insert(new, key)
+        self._section_add([record], new)
+        self._invalidate()
+
+        self._notify("move", key, old=old, new=new)
+        return new
+
+    def update(self, key, **fields):
+        """ Update record fields, indexes are kept in sync. Only the fields
+            which actually changed are sent to the listeners, along with
+            their previous values.
+        """
+
+        record = self._records[key]
+
+        changed = {}
+        previous = {}
+        for field, value in fields.items():
+            if getattr(record, field) != value:
+                changed[field] = value
+                previous[field] = getattr(record, field)
+
+        if not changed:
+            return {}
+
+        indexed = [f for f in self.INDEXED_FIELDS if f in changed]
+        self._unindex(record, indexed)
+        for field, value in changed.items():
+            setattr(record, field, value)
+        self._index(record, indexed)
+
+        self._notify("update", key, fields=changed, previous=previous)
+        return changed
+
+    def clear(self):
+
+        self._records = {}
+        self._order = []
+        self._bookmark_count = 0
+        self._indexes = dict((f, {}) for f in self.INDEXED_FIELDS)
+        self._path_trie.clear()
+        self._sections = {None:[]}
+        self._section_owner = {}
+        self._invalidate()
+
+        self._notify("clear", None)
+
+    # serialization
+
+    def data(self):
+
+        return [self._records[k].data(i) for i, k in enumerate(self._order)]
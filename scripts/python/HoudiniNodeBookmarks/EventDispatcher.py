@@ -0,0 +1,136 @@
+# MIT License
+#
+# Copyright (c) 2017-2020 Guillaume Jobst, www.cgtoolbox.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+""" Node events batching.
+
+    Node callbacks can fire thousands of times in a row ( paste, collapse
+    into subnet, delete of a big network ... ), the dispatcher collects
+    them and runs a single merged refresh once the current tick is done.
+"""
+
+from collections import OrderedDict
+
+CHILD_CREATED = "created"
+PARENT_DELETED = "deleted"
+RENAMED = "renamed"
+
+class CoalescingDispatcher(object):
+    """ Collects node events and flushes them as one batch.
+
+        schedule(callable) must run the given callable later, e.g. on the
+        next idle event. flush_callback(events, stats) gets the merged
+        events as a list of (kind, parent_path, child_paths) tuples.
+
+        Events of the same kind on the same parent path are merged, the
+        created children paths being accumulated, a deleted parent located
+        under another deleted parent is dropped.
+    """
+
+    def __init__(self, schedule, flush_callback):
+
+        self._schedule = schedule
+        self._flush_callback = flush_callback
+
+        self._pending = OrderedDict()
+        self._received = 0
+        self._scheduled = False
+
+        self.total_received = 0
+        self.total_coalesced = 0
+        self.total_flushes = 0
+
+    def post(self, kind, parent_path=None, child_path=None):
+
+        self._received += 1
+        self.total_received += 1
+
+        k = (kind, parent_path)
+        children = self._pending.get(k)
+        if children is None:
+            children = OrderedDict()
+            self._pending[k] = children
+
+        if child_path is not None:
+            children[child_path] = None
+
+        if not self._scheduled:
+            self._scheduled = True
+            self._schedule(self.flush)
+
+    def pending(self):
+
+        return len(self._pending)
+
+    def _merge(self, pending):
+
+        deleted = sorted([p for kind, p in pending.keys() \
+                          if kind == PARENT_DELETED and p is not None])
+
+        # keep only the top most deleted parents
+        top_deleted = set()
+        last = None
+        for p in deleted:
+            if last is not None and p.startswith(last + '/'):
+                continue
+            top_deleted.add(p)
+            last = p
+
+        events = []
+        for (kind, parent_path), children in pending.items():
+            if kind == PARENT_DELETED and not parent_path in top_deleted:
+                continue
+            events.append((kind, parent_path, list(children.keys())))
+
+        return events
+
+    def flush(self):
+
+        pending = self._pending
+        received = self._received
+
+        self._pending = OrderedDict()
+        self._received = 0
+        self._scheduled = False
+
+        if not pending:
+            return []
+
+        events = self._merge(pending)
+
+        coalesced = received - len(events)
+        self.total_coalesced += coalesced
+        self.total_flushes += 1
+
+        stats = {"received":received,
+                 "dispatched":len(events),
+                 "coalesced":coalesced}
+
+        self._flush_callback(events, stats)
+        return events
+
+    def stats(self):
+
+        return {"received":self.total_received,
+                "coalesced":self.total_coalesced,
+                "flushes":self.total_flushes,
+                "pending":self._received}
@@ -0,0 +1,252 @@
+# MIT License
+#
+# Copyright (c) 2017-2020 Guillaume Jobst, www.cgtoolbox.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+""" Bookmark files and recents I/O off the UI thread.
+
+    Reads and writes run on a single worker thread, in submission order,
+    the results are handed back to the UI thread by a deliver function.
+    Files are written next to their destination first, then renamed over
+    it, so an interrupted write never leaves a truncated file.
+"""
+
+import json
+import os
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+MAX_RECENTS = 10
+
+def atomic_write(path, raw):
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(raw)
+
+    if hasattr(os, "replace"):
+        os.replace(tmp_path, path)
+    else:
+        # py2 on windows can't rename over an existing file
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(tmp_path, path)
+
+def dump_bookmarks(data, compact=False):
+    """ .bkm file content, indented unless compact.
+    """
+
+    if compact:
+        text = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    else:
+        text = json.dumps(data, ensure_ascii=False, indent=4)
+
+    if not isinstance(text, bytes):
+        text = text.encode("utf-8")
+    return text
+
+def write_bookmarks(path, data, compact=False):
+
+    atomic_write(path, dump_bookmarks(data, compact))
+    return path
+
+def check_bookmarks_data(data):
+    """ Raises ValueError if data isn't valid bookmarks file data.
+    """
+
+    if not isinstance(data, dict):
+        raise ValueError("not a bookmarks file")
+
+    entries = data.get("bookmark_data")
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("'bookmark_data' is empty or non-existent")
+
+    for e in entries:
+        if not isinstance(e, dict) or not e.get("type") in ("bookmark", "separator"):
+            raise ValueError("invalid entry: " + str(e))
+
+    return data
+
+def read_bookmarks(path, check=False):
+
+    with open(path, "rb") as f:
+        data = json.loads(f.read().decode("utf-8"))
+
+    if check:
+        check_bookmarks_data(data)
+    return data
+
+class FileWorker(object):
+    """ Runs file tasks on a daemon thread.
+
+        deliver(callable) must run the given callable on the UI thread,
+        the task's callback is called there as callback(result, error),
+        error being None on success.
+    """
+
+    def __init__(self, deliver):
+
+        self._deliver = deliver
+        self._tasks = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, args=(), callback=None):
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name="NodeBookmarksFileIO")
+                self._thread.daemon = True
+                self._thread.start()
+
+        self._tasks.put((func, args, callback))
+
+    def wait(self, timeout=2.0):
+        """ Wait for the tasks submitted so far, returns False on timeout.
+        """
+
+        if self._thread is None:
+            return True
+
+        done = threading.Event()
+        self._tasks.put((done.set, (), None))
+        return done.wait(timeout)
+
+    def _run(self):
+
+        while True:
+            func, args, callback = self._tasks.get()
+
+            result = None
+            error = None
+            try:
+                result = func(*args)
+            except Exception as e:
+                error = e
+
+            if callback is not None:
+                self._deliver(lambda c=callback, r=result, e=error: c(r, e))
+
+class RecentFiles(object):
+    """ Recently opened bookmark files, most recent last. The list lives
+        in memory, it is read once and written back lazily by the worker:
+        changes made while a write is pending are written with it.
+    """
+
+    def __init__(self, path, worker, max_size=MAX_RECENTS):
+
+        self.path = path
+        self.worker = worker
+        self.max_size = max_size
+
+        self._files = []
+        self._loaded = False
+        self._dirty = False
+        self._flush_pending = False
+        self._lock = threading.Lock()
+
+    def files(self):
+
+        with self._lock:
+            return list(self._files)
+
+    def load(self, callback=None):
+        """ Read the recents file once, callback() is called on the UI
+            thread when done.
+        """
+
+        if self._loaded:
+            return
+
+        self._loaded = True
+        self.worker.submit(self._read,
+                           callback=lambda r, e: callback() if callback else None)
+
+    def _read(self):
+        """ Runs on the worker, before any write submitted after load().
+        """
+
+        files = []
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "rb") as f:
+                    data = f.read().decode("utf-8")
+                files = [d for d in data.split('\n') if d.strip() != ""]
+        except (IOError, OSError) as e:
+            print("Error: can't read recents file: " + str(e))
+
+        with self._lock:
+            # files added before the read was done are the most recent
+            added = self._files
+            self._files = [f for f in files if not f in added] + added
+            del(self._files[:-self.max_size])
+
+    def add(self, path):
+
+        self.load()
+        with self._lock:
+            if path in self._files:
+                return
+            self._files.append(path)
+            del(self._files[:-self.max_size])
+        self._schedule_flush()
+
+    def clear(self):
+
+        self.load()
+        with self._lock:
+            self._files = []
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+
+        with self._lock:
+            self._dirty = True
+            if self._flush_pending:
+                return
+            self._flush_pending = True
+
+        self.worker.submit(self.flush)
+
+    def flush(self):
+        """ Write the recents if they changed, called by the worker or at
+            exit.
+        """
+
+        with self._lock:
+            self._flush_pending = False
+            if not self._dirty:
+                return
+            self._dirty = False
+            files = list(self._files)
+
+        try:
+            if files:
+                atomic_write(self.path, "".join([f + '\n' for f in files]).encode("utf-8"))
+            elif os.path.exists(self.path):
+                os.remove(self.path)
+        except (IOError, OSError) as e:
+            print("Error: can't save recents file: " + str(e))
@@ -0,0 +1,248 @@
+# MIT License
+#
+# Copyright (c) 2017-2020 Guillaume Jobst, www.cgtoolbox.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+""" Bookmarks filter.
+
+    Bookmarks are indexed by lowercase text and trigrams, per group of
+    fields: the bookmark name, the node name and type, the node path.
+    A text query of 3 characters or more only checks the bookmarks having
+    all its trigrams, a query extending the previous one only checks the
+    previous matches.
+"""
+
+import re
+
+TEXT = "text"
+FUZZY = "fuzzy"
+REGEX = "regex"
+
+MATCH_MODES = (TEXT, FUZZY, REGEX)
+
+WORD_SEPARATORS = " _-/.:"
+
+def trigrams(text):
+
+    return set(text[i:i + 3] for i in range(len(text) - 2))
+
+def fuzzy_score(query, text):
+    """ Score of query's characters found in order in text, None if they
+        are not all found. Consecutive characters and word starts score
+        higher, shorter texts are ranked first on equal scores.
+    """
+
+    score = 0
+    pos = 0
+    prev = -2
+    for c in query:
+        idx = text.find(c, pos)
+        if idx == -1:
+            return None
+
+        if idx == prev + 1:
+            score += 5
+        elif idx == 0 or text[idx - 1] in WORD_SEPARATORS:
+            score += 3
+        else:
+            score += 1
+
+        prev = idx
+        pos = idx + 1
+
+    return score * 1000 - len(text)
+
+class FilterEngine(object):
+    """ Filter index kept in sync with a BookmarkStore.
+
+        type_name(record) gives the node type name of a bookmark, as the
+        store doesn't know about nodes.
+    """
+
+    GROUPS = ("bookmark", "node", "path")
+
+    def __init__(self, store, type_name=None):
+
+        self.store = store
+        self.type_name = type_name
+
+        self._entries = {}
+        self._trigrams = dict((g, {}) for g in self.GROUPS)
+        self._last = None
+
+        for record in store.bookmarks():
+            self._add(record)
+        store.subscribe(self.on_store_changed)
+
+    def release(self):
+
+        self.store.unsubscribe(self.on_store_changed)
+
+    # index
+
+    def _texts(self, record):
+
+        type_name = ""
+        if self.type_name is not None:
+            type_name = self.type_name(record) or ""
+
+        return {"bookmark":(record.name or "").lower(),
+                "node":'\n'.join([record.node_name, type_name]).lower(),
+                "path":(record.node_path or "").lower()}
+
+    def _add(self, record):
+
+        entry = self._texts(record)
+        self._entries[record.key] = entry
+
+        for group, text in entry.items():
+            postings = self._trigrams[group]
+            for t in trigrams(text):
+                postings.setdefault(t, set()).add(record.key)
+
+    def _remove(self, key):
+
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        for group, text in entry.items():
+            postings = self._trigrams[group]
+            for t in trigrams(text):
+                keys = postings.get(t)
+                if keys is None: continue
+                keys.discard(key)
+                if not keys:
+                    del(postings[t])
+
+    def on_store_changed(self, op, key, info):
+
+        self._last = None
+
+        if op == "insert":
+            record = self.store.get(key)
+            if not record.is_separator:
+                self._add(record)
+
+        elif op == "insert_many":
+            for k in info["keys"]:
+                record = self.store.get(k)
+                if not record.is_separator:
+                    self._add(record)
+
+        elif op == "remove":
+            self._remove(key)
+
+        elif op == "remove_many":
+            for _, record in info["removed"]:
+                self._remove(record.key)
+
+        elif op == "update":
+            fields = info["fields"]
+            if "name" in fields or "node_path" in fields or \
+               "session_id" in fields:
+                self._remove(key)
+                self._add(self.store.get(key))
+
+        elif op == "clear":
+            self._entries = {}
+            self._trigrams = dict((g, {}) for g in self.GROUPS)
+
+    # queries
+
+    def group(self, query, mode):
+        """ Fields searched: bookmark name in "bookmark" mode, node name
+            and type in "node" mode, or node path if the query has a '/'.
+        """
+
+        if mode == "bookmark":
+            return "bookmark"
+        if '/' in query:
+            return "path"
+        return "node"
+
+    def _candidates(self, group, query, match):
+
+        last = self._last
+        if last is not None and last[0] == group and last[1] == match:
+
+            # longer query, only the previous matches can match
+            if match == TEXT and last[2] in query:
+                return last[3]
+            if match == FUZZY and query.startswith(last[2]):
+                return last[3]
+
+        if match == TEXT and len(query) >= 3:
+            postings = []
+            for t in trigrams(query):
+                keys = self._trigrams[group].get(t)
+                if not keys:
+                    return []
+                postings.append(keys)
+
+            postings.sort(key=len)
+            keys = set(postings[0])
+            for p in postings[1:]:
+                keys &= p
+            return keys
+
+        return list(self._entries.keys())
+
+    def filter(self, query, mode="bookmark", match=TEXT):
+        """ Keys of the matching bookmarks, ranked by score in fuzzy mode.
+            Returns None for an empty query, raises re.error if the query
+            is an invalid regular expression in regex mode.
+        """
+
+        if query.strip() == "":
+            self._last = None
+            return None
+
+        group = self.group(query, mode)
+
+        if match == REGEX:
+            pattern = re.compile(query, re.IGNORECASE | re.MULTILINE)
+            keys = [k for k in self._entries.keys() \
+                    if pattern.search(self._entries[k][group])]
+            self._last = None
+            return keys
+
+        query = query.lower()
+        candidates = self._candidates(group, query, match)
+        entries = self._entries
+
+        if match == FUZZY:
+            scored = []
+            for k in candidates:
+                scores = [fuzzy_score(query, t) for t in \
+                          entries[k][group].split('\n')]
+                scores = [s for s in scores if s is not None]
+                if scores:
+                    scored.append((max(scores), k))
+
+            scored.sort(key=lambda s: -s[0])
+            keys = [k for s, k in scored]
+
+        else:
+            keys = [k for k in candidates if query in entries[k][group]]
+
+        self._last = (group, match, query, keys)
+        return keys
@@ -0,0 +1,218 @@
+# MIT License
+#
+# Copyright (c) 2017-2020 Guillaume Jobst, www.cgtoolbox.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+""" Bookmarks data stored in the hip file.
+
+    The data is saved in the session module as a single comment line:
+    a marker, the format version and the zlib compressed JSON data
+    encoded in base64. It is decoded directly, the session module code
+    is never evaluated.
+
+    Older versions saved the data as python code between the legacy
+    START / END markers, it is still read ( as a literal, not executed )
+    to be migrated to the new format.
+"""
+
+import ast
+import base64
+import hashlib
+import json
+import zlib
+
+DATA_MARKER = "# HOUDINI NODE BOOKMARKS DATA"
+DATA_VERSION = 2
+
+LEGACY_START = "# HOUDINI NODE BOOKMARKS START"
+LEGACY_END = "# HOUDINI NODE BOOKMARKS END"
+
+class HipDataError(Exception):
+    pass
+
+def dump_data(data):
+    """ Compact JSON, keys are sorted so the same data always gives the
+        same payload hash.
+    """
+
+    return json.dumps(data, separators=(',', ':'),
+                      sort_keys=True).encode("utf-8")
+
+def payload_hash(raw):
+
+    return hashlib.sha1(raw).hexdigest()
+
+def encode_data(data):
+
+    return _encode_raw(dump_data(data))
+
+def _encode_raw(raw):
+
+    return base64.b64encode(zlib.compress(raw, 9)).decode("ascii")
+
+def decode_data(payload):
+
+    try:
+        raw = zlib.decompress(base64.b64decode(payload))
+        return json.loads(raw.decode("utf-8"))
+    except Exception as e:
+        raise HipDataError("Can't decode bookmarks data: " + str(e))
+
+def make_data_line(data=None, raw=None):
+    """ Data line from the data or from its already dumped JSON.
+    """
+
+    if raw is None:
+        raw = dump_data(data)
+    return "{} {} {}".format(DATA_MARKER, DATA_VERSION, _encode_raw(raw))
+
+def _parse_data_line(line):
+
+    fields = line[len(DATA_MARKER):].split()
+    if len(fields) != 2:
+        raise HipDataError("Invalid bookmarks data line")
+
+    version, payload = fields
+    if version != str(DATA_VERSION):
+        raise HipDataError("Unsupported bookmarks data version: " + version)
+
+    return decode_data(payload)
+
+def _parse_legacy_block(code):
+
+    idx = code.find("return ")
+    if idx == -1:
+        raise HipDataError("Invalid legacy bookmarks data")
+
+    try:
+        return ast.literal_eval(code[idx + len("return "):].strip())
+    except (ValueError, SyntaxError) as e:
+        raise HipDataError("Invalid legacy bookmarks data: " + str(e))
+
+# session module ranges, the markers are searched once and only the
+# data range is sliced, the rest of the source is never split.
+
+def _line_range(source, marker, pos=0):
+    """ (start, end) offsets of the first line starting with marker from
+        pos, end includes the line break. None if not found.
+    """
+
+    if pos == 0 and source.startswith(marker):
+        start = 0
+    else:
+        start = source.find('\n' + marker, max(pos - 1, 0))
+        if start == -1:
+            return None
+        start += 1
+
+    end = source.find('\n', start)
+    if end == -1:
+        end = len(source)
+    else:
+        end += 1
+
+    return start, end
+
+def data_range(source):
+
+    return _line_range(source, DATA_MARKER)
+
+def legacy_range(source):
+    """ Range from the legacy START line to the END line included.
+    """
+
+    start = _line_range(source, LEGACY_START)
+    if start is None:
+        return None
+
+    end = _line_range(source, LEGACY_END, start[1])
+    if end is None:
+        raise HipDataError("Legacy bookmarks data end not found")
+
+    return start[0], end[1]
+
+def has_data(source):
+
+    return DATA_MARKER in source or LEGACY_START in source
+
+def read_data(source):
+    """ Returns (data, is_legacy), data is None if the source doesn't
+        contain any bookmarks data.
+    """
+
+    if not has_data(source):
+        return None, False
+
+    r = data_range(source)
+    if r is not None:
+        return _parse_data_line(source[r[0]:r[1]].rstrip()), False
+
+    r = legacy_range(source)
+    if r is not None:
+        return _parse_legacy_block(source[r[0]:r[1]]), True
+
+    return None, False
+
+def _splice(source, ranges, text=""):
+    """ Replace the first range by text and remove the other ones.
+    """
+
+    ranges = sorted([r for r in ranges if r is not None])
+    if not ranges:
+        return source
+
+    chunks = []
+    last = 0
+    for i, (start, end) in enumerate(ranges):
+        chunks.append(source[last:start])
+        if i == 0:
+            chunks.append(text)
+        last = end
+    chunks.append(source[last:])
+
+    return "".join(chunks)
+
+def strip_data(source):
+    """ Session module source without any bookmarks data, new or legacy.
+    """
+
+    if not has_data(source):
+        return source
+
+    return _splice(source, [data_range(source), legacy_range(source)])
+
+def write_data(source, data=None, line=None):
+    """ Session module source with the given bookmarks data ( or data
+        line ) replacing any existing one. The data line is replaced in
+        place, it is appended if the source doesn't have one yet.
+    """
+
+    if line is None:
+        line = make_data_line(data)
+
+    r = data_range(source)
+    if r is not None:
+        return _splice(source, [r, legacy_range(source)], line + '\n')
+
+    source = strip_data(source)
+    if source.strip() == "":
+        return line + '\n'
+    return source.rstrip('\n') + '\n' + line + '\n'
@@ -0,0 +1,235 @@
+# MIT License
+#
+# Copyright (c) 2017-2020 Guillaume Jobst, www.cgtoolbox.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+""" Append-only journal of the bookmarks changes, for crash recovery.
+
+    The journal is a JSON lines file: a snapshot of the bookmarks data
+    followed by one line per store change, positions being the ones of
+    the store at the time of the change. Appending a change only writes
+    one line, the file is compacted into a new snapshot once it has too
+    many changes. Replaying the changes onto the snapshot in order gives
+    the bookmarks data back.
+"""
+
+import json
+import os
+
+from HoudiniNodeBookmarks import FileIO
+
+SNAPSHOT = "snapshot"
+INSERT = "i"
+INSERT_MANY = "I"
+REMOVE = "r"
+REMOVE_MANY = "R"
+MOVE = "m"
+UPDATE = "u"
+CLEAR = "c"
+
+def dump_line(entry):
+
+    return (json.dumps(entry, separators=(',', ':'), sort_keys=True) + '\n').encode("utf-8")
+
+def read_journal(path):
+    """ Returns ( snapshot, changes ), a last line truncated by a crash
+        is ignored. Raises IOError / OSError if the file can't be read and
+        ValueError if it has no snapshot.
+    """
+
+    with open(path, "rb") as f:
+        lines = f.read().decode("utf-8").split('\n')
+
+    snapshot = None
+    changes = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            break
+
+        if snapshot is None:
+            if not isinstance(entry, dict) or not SNAPSHOT in entry:
+                raise ValueError("journal has no snapshot")
+            snapshot = entry[SNAPSHOT]
+        else:
+            changes.append(entry)
+
+    if snapshot is None:
+        raise ValueError("journal has no snapshot")
+
+    return snapshot, changes
+
+def replay(snapshot, changes):
+    """ Bookmarks data entries from a snapshot and the changes made since.
+    """
+
+    entries = [dict(e) for e in snapshot]
+
+    for change in changes:
+        op = change[0]
+
+        if op == INSERT:
+            entries.insert(change[1], change[2])
+
+        elif op == INSERT_MANY:
+            entries[change[1]:change[1]] = change[2]
+
+        elif op == REMOVE:
+            del(entries[change[1]])
+
+        elif op == REMOVE_MANY:
+            for position in sorted(change[1], reverse=True):
+                del(entries[position])
+
+        elif op == MOVE:
+            entries.insert(change[2], entries.pop(change[1]))
+
+        elif op == UPDATE:
+            entries[change[1]].update(change[2])
+
+        elif op == CLEAR:
+            entries = []
+
+    return entries
+
+class BookmarkJournal(object):
+    """ Journals the changes of a BookmarkStore.
+
+        The file is written by a FileIO.FileWorker, a change costs one
+        line whatever the number of bookmarks, the store is serialized
+        again only every COMPACT_THRESHOLD changes.
+    """
+
+    COMPACT_THRESHOLD = 500
+
+    def __init__(self, store, worker):
+
+        self.store = store
+        self.worker = worker
+
+        self.path = None
+        self.active = False
+        self._snapshot = None
+        self._written = False
+        self._count = 0
+
+        store.subscribe(self.on_store_changed)
+
+    def start(self, path):
+        """ Start a new journal from the current store data, the file of
+            the previous journal is removed.
+        """
+
+        self.stop()
+        if path is None:
+            return
+
+        self.path = path
+        self.active = True
+        self._snapshot = self.store.data()
+        self._written = False
+        self._count = 0
+
+    def stop(self, wait=False):
+        """ Stop journaling and remove the journal file, the changes are
+            saved elsewhere. wait: block until the file is removed.
+        """
+
+        if self.active and self._written:
+            self.worker.submit(remove_file, (self.path,))
+            if wait:
+                self.worker.wait()
+
+        self.path = None
+        self.active = False
+        self._snapshot = None
+        self._written = False
+
+    def compact(self):
+
+        self._snapshot = self.store.data()
+        self._count = 0
+        self.worker.submit(FileIO.atomic_write,
+                           (self.path, dump_line({SNAPSHOT:self._snapshot})))
+        self._written = True
+
+    def append(self, change):
+
+        if not self.active:
+            return
+
+        self._count += 1
+        if self._count > self.COMPACT_THRESHOLD:
+            self.compact()
+            return
+
+        if not self._written:
+            # the file starts with the data the changes apply to
+            raw = dump_line({SNAPSHOT:self._snapshot}) + dump_line(change)
+            self.worker.submit(FileIO.atomic_write, (self.path, raw))
+            self._written = True
+            return
+
+        self.worker.submit(append_file, (self.path, dump_line(change)))
+
+    def on_store_changed(self, op, key, info):
+
+        if not self.active:
+            return
+
+        if op == "insert":
+            self.append([INSERT, info["position"], self.store.get(key).data()])
+
+        elif op == "insert_many":
+            self.append([INSERT_MANY, info["position"],
+                         [self.store.get(k).data() for k in info["keys"]]])
+
+        elif op == "remove":
+            self.append([REMOVE, info["position"]])
+
+        elif op == "remove_many":
+            self.append([REMOVE_MANY, [p for p, _ in info["removed"]]])
+
+        elif op == "move":
+            self.append([MOVE, info["old"], info["new"]])
+
+        elif op == "update":
+            # only the fields saved in the data ( separators have no color )
+            data = self.store.get(key).data()
+            fields = dict((f, v) for f, v in info["fields"].items() if f in data)
+            if fields:
+                self.append([UPDATE, self.store.index_of(key), fields])
+
+        elif op == "clear":
+            self.append([CLEAR])
+
+def append_file(path, raw):
+
+    with open(path, "ab") as f:
+        f.write(raw)
+
+def remove_file(path):
+
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,87 @@
+# MIT License
+#
+# Copyright (c) 2017-2020 Guillaume Jobst, www.cgtoolbox.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+""" Bounded least recently used cache, used for the Qt icons and pixmaps
+    shared by all the bookmark views.
+"""
+
+from collections import OrderedDict
+
+class LRUCache(object):
+    """ Values are created by the factory given to get() on a miss, the
+        least recently used entries are evicted past max_size.
+    """
+
+    def __init__(self, max_size=256):
+
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+
+        return len(self._entries)
+
+    def __contains__(self, key):
+
+        return key in self._entries
+
+    def get(self, key, factory=None):
+
+        try:
+            value = self._entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            if factory is None:
+                return None
+            value = factory()
+            self.set(key, value)
+            return value
+
+        self.hits += 1
+        self._entries[key] = value
+        return value
+
+    def set(self, key, value):
+
+        self._entries.pop(key, None)
+        self._entries[key] = value
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+
+        self._entries.clear()
+
+    def stats(self):
+
+        return {"hits":self.hits,
+                "misses":self.misses,
+                "evictions":self.evictions,
+                "size":len(self._entries),
+                "max_size":self.max_size}
@@ -21,11 +21,12 @@
 # SOFTWARE.
 #
 
-import hashlib
+import atexit
+import bisect
 import hou
 import os
 import time
-import json
+import re
 import tempfile
 import webbrowser
 from PySide2 import QtWidgets
@@ -40,6 +41,21 @@ except ImportError:
     import configparser
 
 import HoudiniNodeBookmarks
+from HoudiniNodeBookmarks.BookmarkStore import BookmarkStore
+from HoudiniNodeBookmarks.BookmarkStore import BookmarkRecord
+from HoudiniNodeBookmarks.BookmarkStore import make_uid
+from HoudiniNodeBookmarks.BookmarkStore import BOOKMARK, SEPARATOR
+from HoudiniNodeBookmarks.BookmarkStore import DEFAULT_TEXT_COLOR
+from HoudiniNodeBookmarks import FileIO
+from HoudiniNodeBookmarks import FilterEngine
+from HoudiniNodeBookmarks import HipStorage
+from HoudiniNodeBookmarks import Journal
+from HoudiniNodeBookmarks import NodeResolver
+from HoudiniNodeBookmarks import Reconciler
+from HoudiniNodeBookmarks.EventDispatcher import CoalescingDispatcher
+from HoudiniNodeBookmarks.EventDispatcher import CHILD_CREATED, PARENT_DELETED, RENAMED
+from HoudiniNodeBookmarks.LRUCache import LRUCache
+from HoudiniNodeBookmarks.Styles import BookmarkStyleSheet
 
 ver = hou.applicationVersion()
 
@@ -54,9 +70,110 @@ CONFIG_FILE = os.path.dirname(__file__) + os.sep + "config.ini"
 
 HELP_URL = "http://cgtoolbox.com/houdini-node-bookmarks-2/"
 
+JOURNAL_EXT = ".bkmjournal"
+
+FILTER_DELAY = 150  # ms
+WATCH_DELAY = 500  # ms, lets external writes finish before reloading
+
+# bookmark names of a multi-nodes selection
+NAME_PATTERN = "{name}"
+NAME_PATTERN_HELP = ("Fields: {name} node's name, {type} node type's name, "
+                     "{parent} parent's name, {index} index in the selection.")
+
+BOOKMARK_NODE_EVENT_TYPES = (hou.nodeEventType.NameChanged,
+                             hou.nodeEventType.BeingDeleted,
+                             hou.nodeEventType.ChildCreated,
+                             hou.nodeEventType.FlagChanged)
+
+# node type category => config.ini bookmark_colors entry
+CATEGORY_COLOR_ENTRIES = {"Object":"obj",
+                          "Sop":"sop",
+                          "Vop":"vop",
+                          "Driver":"out",
+                          "Cop2":"cop",
+                          "Chop":"chl",
+                          "Shop":"shp"}
+
+# icons and pixmaps shared by all the bookmark views, keyed by
+# (icon name, size), size is None for the icons
+IconCache = LRUCache(max_size=512)
+
+def get_houdini_icon(name):
+
+    return IconCache.get((name, None),
+                         lambda: hou.ui.createQtIcon(name))
+
+def get_houdini_pixmap(name, width, height):
+
+    return IconCache.get((name, (width, height)),
+                         lambda: get_houdini_icon(name).pixmap(width, height))
+
+# row colors interned by (color, text_color) pair, shared by all views
+BookmarkStyles = BookmarkStyleSheet()
+
+# bookmarks model shared by all the panels, a change is made once and
+# the panels' views are updated from the store notifications
+SharedStore = BookmarkStore()
+
+# where the shared store bookmarks were loaded from: a .bkm file path,
+# HIP_SOURCE or None, only loading the same source again reconciles them
+HIP_SOURCE = "hip"
+LoadedSource = None
+
+# .bkm and recents files are read and written by a worker thread, the
+# results are handled on the UI thread
+FileTasks = FileIO.FileWorker(hdefereval.executeDeferred)
+Recents = FileIO.RecentFiles(RECENTS_FILE, FileTasks)
+atexit.register(Recents.flush)
+
+# changes of the shared store not saved in the hip file yet, journaled
+# next to the hip file to be recovered after a crash
+BookmarkLog = Journal.BookmarkJournal(SharedStore, FileTasks)
+
 def get_icon(ico_name):
 
-    return hou.ui.createQtIcon("HoudiniNodeBookmarks" + os.sep + ico_name)
+    return get_houdini_icon("HoudiniNodeBookmarks" + os.sep + ico_name)
+
+def get_type_icon_name(node_type):
+
+    try:
+        return node_type.icon()
+    except hou.OperationFailed:
+        return "SOP_subnet"
+
+def get_record_type_name(record):
+
+    if record.session_id is None:
+        return ""
+
+    n = hou.nodeBySessionId(record.session_id)
+    if n is None:
+        return ""
+    return n.type().name()
+
+# filter index of the shared store
+SharedFilter = FilterEngine.FilterEngine(SharedStore,
+                                         type_name=get_record_type_name)
+
+def format_bookmark_name(pattern, node, index=0):
+    """ Bookmark name from a pattern like "{name}_{type}", raises KeyError,
+        IndexError or ValueError if the pattern is invalid.
+    """
+
+    parent = node.parent()
+    return pattern.format(name=node.name(),
+                          type=node.type().name(),
+                          parent=parent.name() if parent else "",
+                          index=index)
+
+def get_color_entry(node_cat):
+
+    return CATEGORY_COLOR_ENTRIES.get(node_cat, "oth")
+
+def get_default_color(node):
+
+    cat = node.type().category().name()
+    return ConfigFile.get_node_colors(get_color_entry(cat).upper())
 
 def create_bookmarks_interface():
 
@@ -69,18 +186,71 @@ def create_bookmarks_interface():
     i.attachToDesktop(True)
     return i.paneTabs()[0]
 
-def get_bookmarks_interfaces():
-    
-    bookmark_interface = [i for i in hou.ui.paneTabs() \
-                          if isinstance(i, hou.PythonPanel) \
-                          and i.activeInterface().name() == "Node_Bookmarks"]
+class PanelRegistry(object):
+    """ Live NodesBookmark panels in creation order. Panels register when
+        created by init_bookmark_view and unregister when released by the
+        pypanel's onDestroy, or when the widget is destroyed, so callbacks
+        don't have to scan the desktop pane tabs.
+    """
+
+    def __init__(self):
 
-    if bookmark_interface:
-        return bookmark_interface
+        self._panels = []
 
-    return None
+    def __len__(self):
+
+        return len(self._panels)
+
+    def register(self, panel):
+
+        if panel in self._panels:
+            return
+
+        self._panels.append(panel)
+
+        # the C++ widget is gone when destroyed is emitted, only its id
+        # is used to find it back
+        panel_id = id(panel)
+        panel.destroyed.connect(lambda *args: self._destroyed(panel_id))
+
+    def unregister(self, panel):
+
+        self._discard(id(panel))
+
+    def _destroyed(self, panel_id):
+        """ Panel destroyed without being released, its views still
+            listen to the shared store.
+        """
+
+        for panel in self._panels:
+            if id(panel) != panel_id: continue
+
+            try:
+                panel.release()
+            except RuntimeError:
+                # only the panel's own timers are left, already deleted
+                pass
+
+        self._discard(panel_id)
 
-def _get_selection_and_interfaces():
+    def _discard(self, panel_id):
+
+        self._panels = [p for p in self._panels if id(p) != panel_id]
+
+    def panels(self):
+
+        return list(self._panels)
+
+LivePanels = PanelRegistry()
+
+def get_bookmarks_panels():
+    """ Live NodesBookmark panels, the first one applies the changes
+        made from outside of the panels to the shared store.
+    """
+
+    return LivePanels.panels()
+
+def _get_selection_and_panels():
 
     selection = hou.selectedNodes()
     if not selection:
@@ -88,76 +258,191 @@ def _get_selection_and_interfaces():
                                "please select a node to add a bookmark"))
         return None, None
 
-    node = selection[0]
+    panels = get_bookmarks_panels()
+    if not panels:
+        panels = [create_bookmarks_interface().activeInterfaceRootWidget()]
 
-    interfaces = get_bookmarks_interfaces()
-    if not interfaces:
-        interfaces = [create_bookmarks_interface()]
-
-    return node, interfaces
+    return selection, panels
 
 def add_bookmark():
+    """ Bookmarks all the selected nodes, saved once in the hip file.
+        The panels share the same store, the nodes are added once.
+    """
 
-    node, interfaces = _get_selection_and_interfaces()
-    if not node: return
+    nodes, panels = _get_selection_and_panels()
+    if not nodes: return
 
-    node_bkm_ui = None
-    for i in interfaces:
-        w = i.activeInterfaceRootWidget()
-        w.bookmark_view.insert_bookmark(node.path())
-        node_bkm_ui = w
-    
-    if node_bkm_ui:
-        auto_save = ConfigFile.get_ui_prefs("auto_save_to_hip")
-        if auto_save:
-            node_bkm_ui.save_to_hip(verbose=False)
+    if panels[0].bookmark_view.insert_bookmarks(nodes):
+        HipData.mark_dirty()
 
 def remove_bookmark():
 
-    node, interfaces = _get_selection_and_interfaces()
-    if not node: return
-
-    bkm_found = False
-    node_bkm_ui = None
-    for i in interfaces:
-        w = i.activeInterfaceRootWidget()
-        bkm = w.bookmark_view.get_bookmark(node.path())
-        if bkm:
-            bkm_found = True
-            bkm.remove_me()
-            node_bkm_ui = w
+    nodes, panels = _get_selection_and_panels()
+    if not nodes: return
 
-    if not bkm_found:
+    if not panels[0].bookmark_view.remove_bookmarks(nodes):
         hou.ui.displayMessage("Selected node is not saved as bookmark")
     else:
-        if node_bkm_ui:
-            auto_save = ConfigFile.get_ui_prefs("auto_save_to_hip")
-            if auto_save:
-                node_bkm_ui.save_to_hip(verbose=False)
+        HipData.mark_dirty()
 
 def init_bookmark_view():
 
     w = NodesBookmark()
+    LivePanels.register(w)
     return w
 
-def safe_apply_callback(node, callback_types, callback):
-    """ Apply a callback on a node but check before if
-        any callback of the same type has been added already.
+class ParentCallbackRegistry(object):
+    """ Path refresh callbacks installed on the parents of the bookmarked
+        nodes. Parents are refcounted by the number of bookmarked nodes
+        located under them: callbacks are added when a parent is first
+        used and removed when its last bookmarked node is released.
+    """
+
+    def __init__(self):
+
+        self._parents = {}  # parent session id => [node, refcount]
+        self._owners = {}   # owner => parents session ids
+
+    def __len__(self):
+
+        return len(self._parents)
+
+    def _callbacks(self):
+
+        return ((hou.nodeEventType.NameChanged,
+                 refresh_bookmarks_callbacks_renamed),
+                (hou.nodeEventType.ChildCreated,
+                 refresh_bookmark_callbacks_childcreated),
+                (hou.nodeEventType.BeingDeleted,
+                 refresh_bookmark_callbacks_parent_deleted))
+
+    def _install(self, node):
+
+        for event_type, callback in self._callbacks():
+            node.addEventCallback((event_type,), callback)
+
+    def _uninstall(self, node):
+
+        try:
+            for event_type, callback in self._callbacks():
+                node.removeEventCallback((event_type,), callback)
+        except (hou.ObjectWasDeleted, hou.OperationFailed):
+            pass
+
+    def acquire(self, owner, node):
+        """ Add a reference from owner on all the parents of the given
+            node, a previous reference from the same owner is released.
+        """
+
+        session_ids = []
+        n = node
+        while n.parent() is not None and n.parent().path() != '/':
+            p = n.parent()
+            session_id = p.sessionId()
+
+            entry = self._parents.get(session_id)
+            if entry is None:
+                self._install(p)
+                self._parents[session_id] = [p, 1]
+            else:
+                entry[1] += 1
+
+            session_ids.append(session_id)
+            n = p
+
+        # released after, parents still in use are not reinstalled
+        self.release(owner)
+        self._owners[owner] = session_ids
+
+    def release(self, owner):
+
+        session_ids = self._owners.pop(owner, None)
+        if not session_ids:
+            return
+
+        for session_id in session_ids:
+            entry = self._parents.get(session_id)
+            if entry is None: continue
+
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del(self._parents[session_id])
+                self._uninstall(entry[0])
+
+ParentCallbacks = ParentCallbackRegistry()
+
+def repolish_widget(w):
+    """ Apply the style sheet rules again after a dynamic property change.
+    """
+
+    style = w.style()
+    style.unpolish(w)
+    style.polish(w)
+    w.update()
+
+def set_flag_state(btn, state):
+
+    btn.setProperty("flagState", "on" if state else "off")
+    if btn.testAttribute(Qt.WA_WState_Polished):
+        repolish_widget(btn)
+
+NODE_FLAGS = (("bypass", "isBypassed"),
+              ("template", "isTemplateFlagSet"),
+              ("display", "isDisplayFlagSet"))
+
+def read_node_flags(node):
+    """ (flag, state) of the bypass, template and display flags, state is
+        None if the node doesn't have the flag.
+    """
+
+    states = []
+    for flag, getter in NODE_FLAGS:
+        if hasattr(node, getter):
+            states.append((flag, getattr(node, getter)()))
+        else:
+            states.append((flag, None))
+    return states
+
+def get_node_flag(node, flag):
+
+    if flag == "bypass":
+        return node.isBypassed()
+    if flag == "template":
+        return node.isTemplateFlagSet()
+    if flag == "display":
+        return node.isDisplayFlagSet()
+    return False
+
+def toggle_node_flag(node, flag):
+
+    toggle = not get_node_flag(node, flag)
+
+    if flag == "bypass":
+        node.bypass(toggle)
+    elif flag == "template":
+        node.setTemplateFlag(toggle)
+    elif flag == "display":
+        node.setDisplayFlag(toggle)
+        if hasattr(node, "setRenderFlag"):
+            node.setRenderFlag(toggle)
+
+def dispatch_node_events(events, stats):
+    """ Run the merged node events batch on the shared store, called once
+        per tick by NodeEvents. The first panel applies it, the others
+        get the store changes.
     """
 
     try:
-        callback_name = callback.func_name
-    except AttributeError:
-        callback_name = callback.__name__  #py3
-    callbacks = node.eventCallbacks()
-    if callbacks:
-        for ctype, cfunc in callbacks:
-            try:
-                if cfunc.func_name == callback_name: return
-            except AttributeError:
-                if cfunc.__name__ == callback_name: return  #py3
+        panels = get_bookmarks_panels()
+        if not panels: return
 
-    node.addEventCallback(callback_types, callback)
+        panels[0].apply_node_events(events, stats)
+    except Exception as e:
+        print("Callback error, dispatch_node_events: " + str(e))
+
+NodeEvents = CoalescingDispatcher(
+                lambda f: hdefereval.executeDeferredAfterWaiting(f, 1),
+                dispatch_node_events)
 
 def refresh_bookmarks_callbacks_renamed(**kwargs):
     """ Callback type nodeRenamed applied to all parents to the 
@@ -166,71 +451,160 @@ def refresh_bookmarks_callbacks_renamed(**kwargs):
     """
     
     try:
-        interfaces = get_bookmarks_interfaces()
-        if not interfaces: return
-
         node = kwargs.get("node")
         if not node: return
-    
-        for i in interfaces:
-            w = i.activeInterfaceRootWidget()
-            w.refresh_bookmark_paths()
+
+        NodeEvents.post(RENAMED)
     except Exception as e:
         print("Callback error, refresh_bookmarks_callbacks_renamed: " + str(e))
 
 def refresh_bookmark_callbacks_parent_deleted(**kwargs):
     
     try:
-        interfaces = get_bookmarks_interfaces()
-        if not interfaces: return
-
         node = kwargs.get("node")
         if not node: return
 
-        for i in interfaces:
-            w = i.activeInterfaceRootWidget()
-
-            hdefereval.executeDeferredAfterWaiting(w.refresh_bookmark_paths, 1,
-                                                    parent_path=node.path(),
-                                                    created_child_path=None,
-                                                    parent_being_deleted=True)
+        NodeEvents.post(PARENT_DELETED, node.path())
     except Exception as e:
         print("Callback error, refresh_bookmark_parent_deleted: " + str(e))
 
 def refresh_bookmark_callbacks_childcreated(**kwargs):
     
     try:
-        interfaces = get_bookmarks_interfaces()
-        if not interfaces: return
-
         node = kwargs.get("node")
         if not node: return
 
         child_node = kwargs["child_node"]
 
-        for i in interfaces:
-            w = i.activeInterfaceRootWidget()
-
-            hdefereval.executeDeferredAfterWaiting(w.refresh_bookmark_paths, 1,
-                                                   parent_path=node.path(),
-                                                   created_child_path=child_node.path())
+        NodeEvents.post(CHILD_CREATED, node.path(), child_node.path())
     except Exception as e:
         print("Callback error, refresh_bookmark_callbacks_childcreated: " + str(e))
 
+def parse_config_bool(value):
+    """ Config boolean, None if the value is invalid.
+    """
+
+    v = str(value).strip().lower()
+    if v in ("1", "yes", "true", "on"):
+        return True
+    if v in ("0", "no", "false", "off"):
+        return False
+    return None
+
+def parse_config_int(value):
+    """ Config positive int, None if the value is invalid.
+    """
+
+    try:
+        v = int(str(value).strip())
+    except ValueError:
+        return None
+    if v < 0:
+        return None
+    return v
+
+def parse_config_color(value):
+    """ Config color "r, g, b" to a list of 3 ints, None if invalid.
+    """
+
+    v = str(value).strip().strip("[]()")
+    try:
+        color = [int(c) for c in v.split(',')]
+    except ValueError:
+        return None
+
+    if len(color) != 3:
+        return None
+    return color
+
 class Config():
+    """ config.ini is parsed once in a typed snapshot, getters are dict
+        lookups. Changes are written back to the file after FLUSH_DELAY ms,
+        several changes in a row are saved in one write.
+    """
 
-    def __init__(self):
+    FLUSH_DELAY = 500
 
+    CONVERTERS = {"ui_prefs":parse_config_bool,
+                  "display_prefs":parse_config_bool,
+                  "hip_prefs":parse_config_int,
+                  "bookmark_colors":parse_config_color}
+
+    _MISSING = object()
+
+    def __init__(self, path=CONFIG_FILE):
+
+        self.path = path
         self.config = configparser.ConfigParser()
-        self.config.read(CONFIG_FILE)
+        self.config.read(path)
+
+        self.values = {}
+        for section in self.config.sections():
+            for entry, value in self.config.items(section):
+                self.values[(section, entry)] = self._convert(section, value)
+
+        self._dirty = False
+        self._flush_timer = None
+
+        atexit.register(self.flush)
+
+    def _convert(self, section, value):
+
+        converter = self.CONVERTERS.get(section)
+        if converter is None:
+            return value
+        return converter(value)
+
+    def _get(self, section, entry):
+
+        return self.values.get((section, entry.lower()), self._MISSING)
 
     def __set(self, section, entry, value):
 
-        with open(CONFIG_FILE, 'w') as f:
-            ConfigFile.config.set(section,
-                                  entry,
-                                  value)
-            ConfigFile.config.write(f)
+        entry = entry.lower()
+        if not self.config.has_section(section):
+            self.config.add_section(section)
+        self.config.set(section, entry, value)
+        self.values[(section, entry)] = self._convert(section, value)
+
+        self._dirty = True
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+
+        if self._flush_timer is None:
+            self._flush_timer = QtCore.QTimer()
+            self._flush_timer.setSingleShot(True)
+            self._flush_timer.timeout.connect(self.flush)
+        self._flush_timer.start(self.FLUSH_DELAY)
+
+    def flush(self):
+        """ Write the pending changes, the file is written next to the
+            config file first then renamed over it.
+        """
+
+        if not self._dirty:
+            return
+        self._dirty = False
+
+        if self._flush_timer is not None:
+            self._flush_timer.stop()
+
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                self.config.write(f)
+
+            if hasattr(os, "replace"):
+                os.replace(tmp_path, self.path)
+            else:
+                # py2 on windows can't rename over an existing file
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                os.rename(tmp_path, self.path)
+
+        except (IOError, OSError) as e:
+            print("Error: can't save config file: " + str(e))
 
     def set_node_colors(self, entry, value):
 
@@ -238,61 +612,254 @@ class Config():
     
     def get_node_colors(self, node_type):
         
-        try:
-            return eval(self.config.get("bookmark_colors", node_type))
+        color = self._get("bookmark_colors", node_type)
 
-        except configparser.NoOptionError:
+        if color is self._MISSING:
             hou.ui.displayMessage(("Error: color option '{}' "
                                     "not found in config.ini.".format(node_type)),
                                   severity = hou.severityType.Error)
             return [75, 75, 75]
 
-        except:
+        if color is None:
             hou.ui.displayMessage(("Error: color option '{}' in "
                                    "config.ini invalid format, mst be: "
                                    "(int) [r, g, b].".format(node_type)),
                                   severity = hou.severityType.Error)
             return [75, 75, 75]
 
+        return list(color)
+
     def set_display_pref(self, entry, value):
 
         self.__set("display_prefs", entry, value)
 
     def get_display_pref(self, pref):
 
-        try:
-            return self.config.getboolean("display_prefs", pref)
+        value = self._get("display_prefs", pref)
 
-        except configparser.NoOptionError:
+        if value is self._MISSING:
             hou.ui.displayMessage(("Error: display pref '{}'"
                                     " not found in config.ini.".format(pref)),
                                     severity = hou.severityType.Error)
             return True
 
+        if value is None:
+            hou.ui.displayMessage(("Error: display pref '{}'"
+                                    " invalid format in config.ini, "
+                                    "must be 'True' or 'False'.".format(pref)),
+                                    severity = hou.severityType.Error)
+            return True
+
+        return value
+
+    def get_hip_prefs(self, pref, default=1000):
+
+        value = self._get("hip_prefs", pref)
+
+        if value is self._MISSING or value is None:
+            return default
+
+        return value
+
     def set_ui_prefs(self, entry, value):
 
         self.__set("ui_prefs", entry, value)
 
     def get_ui_prefs(self, pref):
         
-        try:
-            return self.config.getboolean("ui_prefs", pref)
+        value = self._get("ui_prefs", pref)
 
-        except configparser.NoOptionError:
-            hou.ui.displayMessage(("Error: ui pref 'ask_for_name'"
-                                    " not found in config.ini."),
+        if value is self._MISSING:
+            hou.ui.displayMessage(("Error: ui pref '{}'"
+                                    " not found in config.ini.".format(pref)),
                                     severity = hou.severityType.Error)
             return False
 
-        except:
-            hou.ui.displayMessage(("Error: ui pref 'ask_for_name'"
+        if value is None:
+            hou.ui.displayMessage(("Error: ui pref '{}'"
                                     " invalid format in config.ini, "
-                                    "must be 'True' or 'False'."),
+                                    "must be 'True' or 'False'.".format(pref)),
                                     severity = hou.severityType.Error)
             return False
 
+        return value
+
 ConfigFile = Config()
 
+def remove_legacy_session_data():
+
+    if hasattr(hou.session, "get_node_bookmarks_data"):
+        del(hou.session.get_node_bookmarks_data)
+
+class HipWriter(object):
+    """ Single writer of the bookmarks hip file data for all the panels.
+        Auto saves flag the data as dirty, it is written at most once per
+        auto save interval from the shared store and the options of the
+        first live panel. Unchanged data isn't written again.
+    """
+
+    def __init__(self):
+
+        self.dirty = False
+        self.data_hash = None
+        self._timer = None
+
+    def mark_dirty(self):
+
+        if not ConfigFile.get_ui_prefs("auto_save_to_hip"):
+            return
+
+        self.dirty = True
+
+        if self._timer is None:
+            self._timer = QtCore.QTimer()
+            self._timer.setSingleShot(True)
+            self._timer.timeout.connect(self.flush)
+        if not self._timer.isActive():
+            self._timer.start(ConfigFile.get_hip_prefs("auto_save_interval"))
+
+    def flush(self):
+
+        if not self.dirty:
+            return
+
+        panels = get_bookmarks_panels()
+        if not panels:
+            return
+
+        bookmark_data = panels[0].get_bookmark_file_data()
+        if bookmark_data:
+            self.write(bookmark_data)
+
+    def write(self, bookmark_data):
+
+        self.dirty = False
+        if self._timer is not None:
+            self._timer.stop()
+
+        raw = HipStorage.dump_data(bookmark_data)
+        raw_hash = HipStorage.payload_hash(raw)
+
+        source = hou.sessionModuleSource()
+        if raw_hash == self.data_hash and \
+           HipStorage.data_range(source) is not None:
+            # same data already in the session module
+            return
+
+        try:
+            source = HipStorage.write_data(source,
+                                           line=HipStorage.make_data_line(raw=raw))
+        except HipStorage.HipDataError as e:
+            hou.ui.displayMessage("Can't save bookmarks to hip file: " + str(e),
+                                  severity=hou.severityType.Error)
+            return
+
+        hou.setSessionModuleSource(source)
+        self.data_hash = raw_hash
+        remove_legacy_session_data()
+
+    def forget(self):
+        """ Called when the hip data is removed or replaced.
+        """
+
+        self.data_hash = None
+
+HipData = HipWriter()
+
+def get_journal_path():
+    """ Journal file of the current hip file, None if it was never saved.
+    """
+
+    if hou.hipFile.isNewFile():
+        return None
+    return os.path.splitext(hou.hipFile.path())[0] + JOURNAL_EXT
+
+def start_journal(recovered=False):
+    """ Start journaling from the current bookmarks. A journal left by
+        another session for this hip file is kept for recovery, unless
+        recovered: its changes were restored, it's rewritten from the
+        current bookmarks.
+    """
+
+    try:
+        path = get_journal_path()
+        if not recovered and path is not None and \
+           path != BookmarkLog.path and os.path.exists(path):
+            BookmarkLog.stop()
+            return
+
+        BookmarkLog.start(path)
+        if recovered and BookmarkLog.active:
+            BookmarkLog.compact()
+    except Exception as e:
+        print("Error, start_journal: " + str(e))
+
+def stop_journal():
+
+    try:
+        BookmarkLog.stop(wait=True)
+    except Exception as e:
+        print("Error, stop_journal: " + str(e))
+
+def hip_file_event_callback(event_type):
+    """ Write the pending bookmarks changes before the hip file is saved,
+        the journal starts over once saved or when another hip is opened.
+    """
+
+    if event_type == hou.hipFileEventType.BeforeSave:
+        flush_all_hip_data()
+
+    elif event_type == hou.hipFileEventType.AfterSave:
+        start_journal()
+
+    elif event_type in (hou.hipFileEventType.AfterLoad,
+                        hou.hipFileEventType.AfterClear):
+        # the new hip has its own data, whatever was written last
+        HipData.forget()
+        start_journal()
+
+        # a journal left for the loaded hip is offered by the open panel,
+        # panels created later offer it themselves
+        if event_type == hou.hipFileEventType.AfterLoad and \
+           not BookmarkLog.active:
+            hdefereval.executeDeferred(offer_journal_recovery)
+
+def offer_journal_recovery():
+
+    try:
+        panels = get_bookmarks_panels()
+        if not panels:
+            return
+
+        panels[0].recover_journal()
+        panels[0].start_journal()
+    except Exception as e:
+        print("Error, offer_journal_recovery: " + str(e))
+
+def flush_all_hip_data():
+
+    try:
+        HipData.flush()
+    except Exception as e:
+        print("Callback error, flush_all_hip_data: " + str(e))
+
+def install_hip_file_callbacks():
+    """ Replace the callback installed by a previous import of the module.
+    """
+
+    for callback in hou.hipFile.eventCallbacks():
+        if getattr(callback, "__name__", "") == "hip_file_event_callback":
+            hou.hipFile.removeEventCallback(callback)
+    hou.hipFile.addEventCallback(hip_file_event_callback)
+
+    app = QtWidgets.QApplication.instance()
+    if app is not None:
+        app.aboutToQuit.connect(flush_all_hip_data)
+        # clean exit, nothing to recover
+        app.aboutToQuit.connect(stop_journal)
+
+install_hip_file_callbacks()
+
 class CustomInput(QtWidgets.QDialog):
 
     def __init__(self, label, icon, defaul_value="", parent=None):
@@ -306,7 +873,7 @@ class CustomInput(QtWidgets.QDialog):
         label_layout = QtWidgets.QHBoxLayout()
         icon_lbl = QtWidgets.QLabel("")
         icon_lbl.setFixedSize(QtCore.QSize(24, 24))
-        icon_lbl.setPixmap(hou.ui.createQtIcon(icon).pixmap(20,20))
+        icon_lbl.setPixmap(get_houdini_pixmap(icon, 20, 20))
         label_layout.addWidget(icon_lbl)
         label_layout.addWidget(QtWidgets.QLabel(label))
         main_layout.addLayout(label_layout)
@@ -388,13 +955,14 @@ class About(QtWidgets.QDialog):
                                             
 class Separator(QtWidgets.QWidget):
 
-    def __init__(self, label, id=0, parent=None):
+    def __init__(self, record, parent=None):
         super(Separator, self).__init__(parent=parent)
 
         main_layout = QtWidgets.QHBoxLayout()
         self.setAutoFillBackground(True)
 
-        self.id = id
+        self.record = record
+        self.key = record.key
         self.bookmarkview = parent
 
         self.children_bg_color = None
@@ -413,74 +981,29 @@ class Separator(QtWidgets.QWidget):
         self.collapsed_label = QtWidgets.QLabel("")
         main_layout.addWidget(self.collapsed_label)
 
-        self.label = QtWidgets.QLabel(label)
+        self.label = QtWidgets.QLabel(record.name)
         main_layout.addWidget(self.label)
 
         main_layout.addWidget(HSep(self))
 
         self.setLayout(main_layout)
         
-        # right click menu
-        self.menu = QtWidgets.QMenu(self)
-        self.menu.setStyleSheet(hou.ui.qtStyleSheet())
-
-        edit_ico = get_icon("edit")
-        self.edit_label_act = QtWidgets.QAction(edit_ico,
-                                                "   Edit Label", self)
-        self.edit_label_act.triggered.connect(self.edit_label)
-        self.menu.addAction(self.edit_label_act)
-
-        color_ico = get_icon("color")
-        self.edit_color_act = QtWidgets.QAction(color_ico,
-                                                "   Edit Children Background Color", self)
-        self.edit_color_act.triggered.connect(self.pick_color)
-        self.menu.addAction(self.edit_color_act)
-
-        color_txt_ico = get_icon("text_color")
-        self.edit_txt_color_act = QtWidgets.QAction(color_txt_ico,
-                                                "   Edit Children Label Color", self)
-        self.edit_txt_color_act.triggered.connect(self.pick_txt_color)
-        self.menu.addAction(self.edit_txt_color_act)
-
-        self.menu.addSeparator()
-
-        rem_ico = get_icon("remove")
-        self.remove_act = QtWidgets.QAction(rem_ico,
-                                            "   Remove Separator", self)
-        self.remove_act.triggered.connect(self.remove_me)
-        self.menu.addAction(self.remove_act)
-
+        # right click menu is shared by all the rows of the view
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self.pop_menu)
 
-    def copy(self, parent):
-
-        s = Separator(self.label.text(), self.id, parent=parent)
-        return s
-
     def find_widgets_to_collapse(self):
+        """ Rows of the separator's section with their drop zones,
+            taken from the store instead of walking the layout.
+        """
 
-        c = self.bookmarkview.bookmark_view_layout.count()
-
+        view = self.bookmarkview
         widgets = []
-        start = False
+        for r in view.store.section(self.key):
+            widgets.append(view.widgets[r.key])
+            widgets.append(view.interwidgets[r.key])
 
-        for i in range(c):
-            it = self.bookmarkview.bookmark_view_layout.itemAt(i)
-            if it:
-
-                w = it.widget()
-                if not w: continue
-
-                if start:
-                    if hasattr(w, "collapsed_children"):
-                        return widgets
-                    widgets.append(w)
-            
-                if w.id == self.id:
-                    start = True
-
-        return widgets           
+        return widgets
 
     def collapse(self):
         
@@ -489,9 +1012,11 @@ class Separator(QtWidgets.QWidget):
             self.collapse_btn.setIcon(get_icon("down"))
             self.collapsed_label.setText("")
 
+            filtered = self.bookmarkview.filtered
             for w in self.find_widgets_to_collapse():
                 w.collapsed = False
-                w.show()
+                w.setVisible(not (isinstance(w, Bookmark) and \
+                                  w.key in filtered))
 
         else:
             self.collapsed = True
@@ -511,73 +1036,35 @@ class Separator(QtWidgets.QWidget):
             self.collapse_btn.setIcon(get_icon("down"))
             return
 
-        nitems = len([w for w in self.find_widgets_to_collapse() if \
-                      hasattr(w, "node")])
+        nitems = self.bookmarkview.store.section_size(self.key)
         self.collapsed_label.setText("(" + str(nitems) + ")")
         self.collapse_btn.setIcon(get_icon("right"))
         self.collapsed_label.show()
 
-    def data(self):
+    def refresh_from_record(self, fields):
 
-        return {"type":"separator",
-                "name":self.label.text(),
-                "id":self.id}
+        if "name" in fields:
+            self.label.setText(self.record.name)
 
     def pop_menu(self):
 
-        self.menu.popup(QtGui.QCursor.pos())
+        self.bookmarkview.pop_context_menu(self.key, QtGui.QCursor.pos())
 
     def remove_me(self):
 
-        it = self.bookmarkview.bookmark_view_layout.itemAt(self.id + 1)
-        if it:
-            w = it.widget()
-            if hasattr(w, "interwidget"):
-                w.setParent(None)
-                w.deleteLater()
-
-        self.setParent(None)
-        self.deleteLater()
-        
-        self.bookmarkview.refresh_bookmark_ids()
+        self.bookmarkview.remove_record(self.key)
 
     def edit_label(self):
 
-        r, v = hou.ui.readInput("Separator name:",
-                                buttons=["Ok", "Cancel"],
-                                initial_contents=self.label.text())
-        if r == 1: return
-
-        self.label.setText(v)
+        self.bookmarkview.edit_name(self.key)
 
     def pick_color(self):
 
-        init_col = QtGui.QColor()
-        opt = QtWidgets.QColorDialog.DontUseNativeDialog 
-        c = QtWidgets.QColorDialog.getColor(init_col,
-                                            None,
-                                            "Pick a color",
-                                            opt)
-        if c.isValid():
-            color = [c.red(), c.green(), c.blue()]
-            for w in self.find_widgets_to_collapse():
-                if hasattr(w, "set_colors"):
-                    w.color = color
-                    w.set_colors()
+        self.bookmarkview.pick_color(self.key)
 
     def pick_txt_color(self):
 
-        init_col = QtGui.QColor()
-        opt = QtWidgets.QColorDialog.DontUseNativeDialog 
-        c = QtWidgets.QColorDialog.getColor(init_col,
-                                            None,
-                                            "Pick a color",
-                                            opt)
-        if c.isValid():
-            color = [c.red(), c.green(), c.blue()]
-            for w in self.find_widgets_to_collapse():
-                w.text_color = color
-                w.set_colors()
+        self.bookmarkview.pick_txt_color(self.key)
 
     def mouseMoveEvent(self, e):
         
@@ -586,12 +1073,12 @@ class Separator(QtWidgets.QWidget):
         
         pixmap = self.grab()
         mimeData = QtCore.QMimeData()
-        mimeData.setText("breaker|%|" + str(self.id))
+        mimeData.setText("breaker|%|" + str(self.key))
 
         # if the separator is collapsed, save the collapsed children to move
         # them with the separator
         if self.collapsed:
-            self.collapsed_children = self.find_widgets_to_collapse()
+            self.collapsed_children = self.bookmarkview.store.section(self.key)
         else:
             self.collapsed_children = []
 
@@ -613,11 +1100,10 @@ class AddSeparator(QtWidgets.QPushButton):
 
     def __init__(self, parent=None):
         super(AddSeparator, self).__init__(parent=parent)
-        ico = get_icon("break")
-
         self.bookmark_view = None
 
-        self.setIcon(ico.pixmap(22, 22))
+        self.setIcon(get_houdini_pixmap("HoudiniNodeBookmarks" + os.sep + "break",
+                                        22, 22))
         self.setFixedWidth(24)
         self.setFixedHeight(24)
         self.setIconSize(QtCore.QSize(22, 22))
@@ -745,283 +1231,207 @@ class NetworkviewInfo(QtWidgets.QWidget):
                                       2)
 
 class BookmarkNodeFlags(QtWidgets.QFrame):
+    """ Node flag buttons of a bookmark row. The buttons are created when
+        the widget is first shown, flag changes received while the row is
+        hidden only mark it dirty, it is refreshed when shown again.
+    """
 
-    def __init__(self, **kwargs):
+    FLAG_ICONS = {"bypass":"NETVIEW_bypass_flag",
+                  "template":"NETVIEW_template_flag",
+                  "display":"NETVIEW_display_flag"}
+
+    FLAG_TOOLTIPS = {"bypass":"Bypass flag",
+                     "template":"Template flag",
+                     "display":"Display flag"}
+
+    def __init__(self, **kwargs):
         super(BookmarkNodeFlags, self).__init__(parent=kwargs["parent"])
         
         self.node_path = kwargs["node_path"]
-        node = hou.node(self.node_path)
 
-        cat = node.type().category()
-        self.node_cat = cat.name()
+        self.buttons = {}
+        self.built = False
+        self.dirty = True
+        self.disabled = False
 
         main_layout = QtWidgets.QHBoxLayout()
         main_layout.setSpacing(2)
         main_layout.setContentsMargins(0,0,0,0)
-
-        self.display_bypass_btn = None
-        self.display_flag_btn = None
-        self.display_template_btn = None
-        
-        if hasattr(node, "bypass"):
-            self.bypass = node.isBypassed()
-            self.display_bypass_btn = QtWidgets.QPushButton("")
-            self.display_bypass_btn.setFixedWidth(18)
-            self.display_bypass_btn.setFixedHeight(28)
-            self.display_bypass_btn.setIcon(hou.ui.createQtIcon("NETVIEW_bypass_flag"))
-            self.display_bypass_btn.setIconSize(QtCore.QSize(12, 12))
-            self.display_bypass_btn.clicked.connect(self.update_bypass_flag)
-            self.display_bypass_btn.setToolTip("Bypass flag")
-            self.update_bypass_flag(init=True)
-            main_layout.addWidget(self.display_bypass_btn)
-        
-        if hasattr(node, "setTemplateFlag"):
-            self.display_template_btn = QtWidgets.QPushButton("")
-            self.display_template_btn.setFixedWidth(18)
-            self.display_template_btn.setFixedHeight(28)
-            self.display_template_btn.setIcon(hou.ui.createQtIcon("NETVIEW_template_flag"))
-            self.display_template_btn.setIconSize(QtCore.QSize(12, 12))
-            self.display_template_btn.clicked.connect(self.update_template_flag)
-            self.display_template_btn.setToolTip("Template flag")
-            self.update_template_flag(init=True)
-            main_layout.addWidget(self.display_template_btn)
-
-        if hasattr(node, "setDisplayFlag"):
-            self.display_flag_btn = QtWidgets.QPushButton("")
-            self.display_flag_btn.setObjectName("nodeFlag")
-            self.display_flag_btn.setFixedWidth(18)
-            self.display_flag_btn.setFixedHeight(28)
-            self.display_flag_btn.setIcon(hou.ui.createQtIcon("NETVIEW_display_flag"))
-            self.display_flag_btn.setIconSize(QtCore.QSize(12, 12))
-            self.display_flag_btn.clicked.connect(self.update_display_flag)
-            self.display_flag_btn.setToolTip("Display flag")
-            self.update_display_flag(init=True)
-            main_layout.addWidget(self.display_flag_btn)
-
         self.setLayout(main_layout)
 
-    def set_disabled(self, toggle):
-        
-        if self.display_bypass_btn is not None:
-            self.display_bypass_btn.setDisabled(toggle)
+    def showEvent(self, e):
 
-        if self.display_flag_btn is not None:
-            self.display_flag_btn.setDisabled(toggle)
+        if not self.built:
+            self.build()
+        if self.dirty:
+            self.refresh()
 
-        if self.display_template_btn is not None:
-            self.display_template_btn.setDisabled(toggle)
+        super(BookmarkNodeFlags, self).showEvent(e)
 
-    def update_display_flag(self, init=False, update_node=True):
+    def build(self, node=None):
 
-        if self.display_flag_btn is None:
-            return
+        self.built = True
 
-        node = hou.node(self.node_path)
+        if node is None:
+            node = hou.node(self.node_path)
         if not node:
             return
-        if hasattr(node, "isDisplayFlagSet"):
-            toggle = node.isDisplayFlagSet()
-        else:
-            return
 
-        if not init:
-            
-            if update_node:
-                node.setDisplayFlag(not toggle)
-                if hasattr(node, "setRenderFlag"):
-                    node.setRenderFlag(not toggle)
-                toggle = node.isDisplayFlagSet()
+        for flag, state in read_node_flags(node):
+            if state is None: continue
+
+            btn = QtWidgets.QPushButton("")
+            if flag == "display":
+                btn.setObjectName("nodeFlag")
+            btn.setFixedWidth(18)
+            btn.setFixedHeight(28)
+            btn.setIcon(get_houdini_icon(self.FLAG_ICONS[flag]))
+            btn.setIconSize(QtCore.QSize(12, 12))
+            btn.setProperty("nodeFlag", flag)
+            btn.clicked.connect(lambda checked=False, f=flag: self.toggle_flag(f))
+            btn.setToolTip(self.FLAG_TOOLTIPS[flag])
+            btn.setDisabled(self.disabled)
+            self.layout().addWidget(btn)
+
+            self.buttons[flag] = btn
+
+    def set_disabled(self, toggle):
         
-        if toggle:
-            col = "#0489bc"
-            col_hov = "#00a5e4"
-        else:
-            col = "#4b4b4b"
-            col_hov = "#707070"
+        self.disabled = toggle
+        for btn in self.buttons.values():
+            btn.setDisabled(toggle)
 
-        sty = """QPushButton{{background-color: {0};
-                              border: 1px solid black}}
-                 QPushButton:hover{{background-color: {1};
-                                    border: 1px solid black}}""".format(col, col_hov)
+    def mark_dirty(self, node=None):
+        """ Flags changed, refreshed now if visible or when shown.
+        """
 
-        self.display_flag_btn.setStyleSheet(sty)
+        self.dirty = True
+        if self.built and self.isVisible():
+            self.refresh(node)
 
-    def update_template_flag(self, init=False, update_node=True):
+    def refresh(self, node=None):
 
-        if self.display_template_btn is None:
+        self.dirty = False
+        if not self.buttons:
             return
 
-        node = hou.node(self.node_path)
+        if node is None:
+            node = hou.node(self.node_path)
         if not node:
             return
 
-        if hasattr(node, "isTemplateFlagSet"):
-            toggle = node.isTemplateFlagSet()
-        else:
+        # all the flags are read at once
+        try:
+            states = read_node_flags(node)
+        except hou.ObjectWasDeleted:
             return
 
-        if not init:
-            
-            if update_node:
-                node.setTemplateFlag(not toggle)
-                toggle = node.isTemplateFlagSet()
-        
-        if toggle:
-            col = "#dd7dd7"
-            col_hov = "#ff82f7"
-        else:
-            col = "#4b4b4b"
-            col_hov = "#707070"
-
-        sty = """QPushButton{{background-color: {0};
-                              border: 1px solid black}}
-                 QPushButton:hover{{background-color: {1};
-                                    border: 1px solid black}}""".format(col, col_hov)
-
-        self.display_template_btn.setStyleSheet(sty)
-
-    def update_bypass_flag(self, init=False, update_node=True):
+        for flag, state in states:
+            btn = self.buttons.get(flag)
+            if btn is not None and state is not None:
+                set_flag_state(btn, state)
 
-        if self.display_bypass_btn is None:
-            return
+    def toggle_flag(self, flag):
 
         node = hou.node(self.node_path)
         if not node:
             return
-        
-        if hasattr(node, "isBypassed"):
-            toggle = node.isBypassed()
-        else:
-            return
-
-        if not init:
-            
-            if update_node:
-                node.bypass(not toggle)
-                toggle = node.isBypassed()
-        
-        if toggle:
-            col = "#b6a642"
-            col_hov = "#cdba47"
-        else:
-            col = "#4b4b4b"
-            col_hov = "#707070"
 
-        sty = """QPushButton{{background-color: {0};
-                              border: 1px solid black}}
-                 QPushButton:hover{{background-color: {1};
-                                    border: 1px solid black}}""".format(col, col_hov)
-
-        self.display_bypass_btn.setStyleSheet(sty)
+        toggle_node_flag(node, flag)
+        self.refresh(node)
 
     def re_init_flags(self):
 
-        self.update_bypass_flag(init=True, update_node=False)
-        self.update_display_flag(init=True, update_node=False)
-        self.update_template_flag(init=True, update_node=False)
+        self.mark_dirty()
 
 class InterWidget(QtWidgets.QFrame):
 
     def __init__(self, parent=None):
         super(InterWidget, self).__init__(parent=parent)
 
-        self.id = 0
+        # key of the row this drop zone follows, None for the first one
+        self.key = None
+        self.collapsed = False
         self.bookmarkview = parent
         self.setFixedHeight(4)
         self.setAcceptDrops(True)
         self.interwidget = True
         
-        self.setStyleSheet("background-color: transparent")
+        self.setObjectName("dropZone")
+        self.setProperty("dropState", "")
+
+    def set_drop_state(self, state):
+
+        self.setProperty("dropState", state)
+        repolish_widget(self)
 
     def enterEvent(self, e):
         
-        self.setStyleSheet(("background-color: "
-                            "rgba(128,128,128,50)"))
+        self.set_drop_state("hover")
 
     def leaveEvent(self, e):
 
-        self.setStyleSheet("background-color: transparent")
+        self.set_drop_state("")
 
     def dragLeaveEvent(self, e):
 
         self.setFixedHeight(4)
-        self.setStyleSheet("background-color: transparent")
+        self.set_drop_state("")
 
     def dragEnterEvent(self, e):
 
         self.setFixedHeight(20)
-        self.setStyleSheet("background-color: #626262")
+        self.set_drop_state("drag")
+
+    def drop_position(self):
+        """ Store position where a dropped item is inserted.
+        """
+
+        if self.key is None:
+            return 0
+        return self.bookmarkview.store.index_of(self.key) + 1
 
     def dropEvent(self, e):
 
         self.setFixedHeight(4)
-        self.setStyleSheet("background-color: transparent")
+        self.set_drop_state("")
 
         e.accept()
         src_w = e.source()
         data = e.mimeData()
         node_path = data.text()
+
+        position = self.drop_position()
         
         if isinstance(src_w, QtWidgets.QPushButton):
-            s_idx = self.bookmarkview.bookmark_view_layout.indexOf(self)
-            self.bookmarkview.insert_separator(s_idx)
-
-        elif hasattr(src_w, "node") or hasattr(src_w, "collapsed_children"):
-            
-            src_id = self.bookmarkview.bookmark_view_layout.indexOf(src_w)
-            s_idx = self.bookmarkview.bookmark_view_layout.indexOf(self)
-
-            # check if the iterwidget is not the direct interwidget or src w
-            prev_it = self.bookmarkview.bookmark_view_layout.itemAt(s_idx - 1)
-            if prev_it:
-                prev_w = prev_it.widget()
-                if hasattr(src_w, "node") or hasattr(src_w, "collapsed_children"):
-                    if prev_w.id == src_id:
-                        return
-
-            inter_w_it = self.bookmarkview.bookmark_view_layout.itemAt(src_id + 1)
-            inter_w = inter_w_it.widget()
-            
-            self.bookmarkview.bookmark_view_layout.removeWidget(src_w)
-            self.bookmarkview.bookmark_view_layout.removeWidget(inter_w)
-            
-            s_idx = self.bookmarkview.bookmark_view_layout.indexOf(self)
-
-            if hasattr(src_w, "collapsed_children") and src_w.collapsed_children:
-                self.bookmarkview.bookmark_view_layout.insertWidget(s_idx + 1, src_w)
-            else:
-                self.bookmarkview.bookmark_view_layout.insertWidget(s_idx, src_w)
+            self.bookmarkview.insert_separator(position)
 
-            idx = self.bookmarkview.bookmark_view_layout.indexOf(src_w)
-            self.bookmarkview.bookmark_view_layout.insertWidget(idx, inter_w)
+        elif isinstance(src_w, (Bookmark, Separator)) and \
+             src_w.bookmarkview is self.bookmarkview:
 
-            if hasattr(src_w, "collapsed_children"):
-                
-                widget_col = src_w.collapsed_children
-                
-                if widget_col:
-                    
-                    for i, wc in enumerate(widget_col):
-                        self.bookmarkview.bookmark_view_layout.removeWidget(wc)
+            keys = [src_w.key]
 
-                    idx = self.bookmarkview.bookmark_view_layout.indexOf(src_w) + 1
+            # a collapsed separator is moved with its children
+            if isinstance(src_w, Separator) and src_w.collapsed_children:
+                keys += [r.key for r in src_w.collapsed_children]
 
-                    for i, wc in enumerate(widget_col):
-                        self.bookmarkview.bookmark_view_layout.insertWidget(idx + i, wc)
-                        wc.show()
+            self.bookmarkview.move_records(keys, position)
 
-                    src_w.collapsed_children = []
-                    src_w.collapsed = False
-                    src_w.update_collapse_label()
+            if isinstance(src_w, Separator) and src_w.collapsed_children:
+                for r in src_w.collapsed_children:
+                    self.bookmarkview.widgets[r.key].collapsed = False
+                    self.bookmarkview.widgets[r.key].show()
+                    self.bookmarkview.interwidgets[r.key].collapsed = False
+                    self.bookmarkview.interwidgets[r.key].show()
 
-            self.bookmarkview.refresh_bookmark_ids()
+                src_w.collapsed_children = []
+                src_w.collapsed = False
+                src_w.update_collapse_label()
 
         else:
-            self.bookmarkview.insert_bookmark(node_path, self.id)
+            self.bookmarkview.insert_bookmark(node_path, position)
 
-        auto_save = ConfigFile.get_ui_prefs("auto_save_to_hip")
-        if auto_save:
-            self.bookmarkview.nodeBookmarks.save_to_hip(verbose=False)
+        self.bookmarkview.nodeBookmarks.auto_save_to_hip()
 
         return True
 
@@ -1038,51 +1448,26 @@ class Bookmark(QtWidgets.QFrame):
 
         self.collapsed = False
 
+        self.record = kwargs["record"]
+        self.key = self.record.key
+        self.bookmarkview = kwargs["parent"]
+
         # try to find node by session ID first
-        if kwargs.get("session_id"):
-            n = hou.nodeBySessionId(kwargs["session_id"])
-        else:
-            n = kwargs["node"]
+        n = None
+        if self.record.session_id is not None:
+            n = hou.nodeBySessionId(self.record.session_id)
+        if n is None:
+            n = hou.node(self.record.node_path)
 
+        # deleted or unresolved nodes get a disabled row
         self.node = n
-        self.node_session_id = self.node.sessionId()
-        self.node_path = self.node.path()
-        self.node_name = self.node.name()
-        self.node_type = self.node.type()
-        self.node_icon = self.node_type.icon()
-        self.bookmark_name = kwargs["name"]
-
-        cat = self.node.type().category()
-        self.node_cat = cat.name()
-
-        if not kwargs.get("color"):
-
-            if self.node_cat == "Object":
-                self.color = ConfigFile.get_node_colors("OBJ")
-            elif self.node_cat == "Sop":
-                self.color = ConfigFile.get_node_colors("SOP")
-            elif self.node_cat == "Vop":
-                self.color = ConfigFile.get_node_colors("VOP")
-            elif self.node_cat == "Driver":
-                self.color = ConfigFile.get_node_colors("OUT")
-            elif self.node_cat == "Cop2":
-                self.color = ConfigFile.get_node_colors("COP")
-            elif self.node_cat == "Chop":
-                self.color = ConfigFile.get_node_colors("CHL")
-            elif self.node_cat == "Shop":
-                self.color = ConfigFile.get_node_colors("SHP")
-            else:
-                self.color = ConfigFile.get_node_colors("OTH")
-        else:
-            self.color = kwargs["color"]
-
-        if not kwargs.get("text_color"):
-            self.text_color = [203, 203, 203]
-        else:
-            self.text_color = kwargs["text_color"]
-        self.id = kwargs["id"]
-        self.uid = kwargs["uid"]
-        self.bookmarkview = kwargs["parent"]
+        self.node_type = None
+        self.node_icon = None
+        self.node_cat = None
+        if n is not None:
+            self.node_type = n.type()
+            self.node_icon = self.node_type.icon()
+            self.node_cat = self.node_type.category().name()
         
         self.setToolTip(self.node_path)
 
@@ -1091,13 +1476,11 @@ class Bookmark(QtWidgets.QFrame):
         self.bookmark_layout.setContentsMargins(5,2,2,2)
         self.bookmark_layout.setAlignment(Qt.AlignLeft)
 
-        try:
-            icon = hou.ui.createQtIcon(self.node_type.icon())
-        except hou.OperationFailed:
-            icon = hou.ui.createQtIcon("SOP_subnet")
         self.icon_lbl = QtWidgets.QLabel("")
-        self.icon_lbl.setStyleSheet("QLabel{border: 0px}")
-        self.icon_lbl.setPixmap(icon.pixmap(22, 22))
+        self.icon_lbl.setObjectName("nodeIcon")
+        if self.node_type is not None:
+            self.icon_lbl.setPixmap(get_houdini_pixmap(get_type_icon_name(self.node_type),
+                                                       22, 22))
         self.icon_lbl.setFixedHeight(22)
         self.icon_lbl.setFixedWidth(22)
         self.icon_lbl.setVisible(ConfigFile.get_display_pref("show_icon"))
@@ -1109,49 +1492,15 @@ class Bookmark(QtWidgets.QFrame):
         self.label.setVisible(ConfigFile.get_display_pref("show_label"))
         self.bookmark_layout.addWidget(self.label)
         
-        self.type_name_label = QtWidgets.QLabel('(' + self.node_type.name() + ')')
+        type_name = ""
+        if self.node_type is not None:
+            type_name = '(' + self.node_type.name() + ')'
+        self.type_name_label = QtWidgets.QLabel(type_name)
         self.type_name_label.setObjectName("nodeTypeName")
         self.type_name_label.setVisible(ConfigFile.get_display_pref("show_type"))
         self.bookmark_layout.addWidget(self.type_name_label)
 
-        # right click menu
-        self.menu = QtWidgets.QMenu(self)
-        self.menu.setStyleSheet(hou.ui.qtStyleSheet())
-
-        edit_ico = get_icon("edit")
-        self.edit_label_act = QtWidgets.QAction(edit_ico,
-                                                "   Edit Label", self)
-        self.edit_label_act.triggered.connect(self.edit_name)
-        self.menu.addAction(self.edit_label_act)
-
-        color_ico = get_icon("color")
-        self.edit_color_act = QtWidgets.QAction(color_ico,
-                                                "   Edit Background Color", self)
-        self.edit_color_act.triggered.connect(self.pick_color)
-        self.menu.addAction(self.edit_color_act)
-
-        color_txt_ico = get_icon("text_color")
-        self.edit_txt_color_act = QtWidgets.QAction(color_txt_ico,
-                                                "   Edit Label Color", self)
-        self.edit_txt_color_act.triggered.connect(self.pick_txt_color)
-        self.menu.addAction(self.edit_txt_color_act)
-
-        default_bg_col_ico = get_icon("palette")
-        self.setcol_as_default = QtWidgets.QAction(default_bg_col_ico,
-                                                "   Set Current BG color as default",
-                                                self)
-
-        self.setcol_as_default.triggered.connect(self.set_default_col)
-        self.menu.addAction(self.setcol_as_default)
-
-        self.menu.addSeparator()
-
-        rem_ico = get_icon("remove")
-        self.remove_act = QtWidgets.QAction(rem_ico,
-                                            "   Remove Bookmark", self)
-        self.remove_act.triggered.connect(self.remove_me)
-        self.menu.addAction(self.remove_act)
-
+        # right click menu is shared by all the rows of the view
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self.pop_menu)
 
@@ -1167,57 +1516,93 @@ class Bookmark(QtWidgets.QFrame):
         self.setLayout(self.bookmark_layout)
         self.set_colors()
 
-        self.callback_types = (hou.nodeEventType.NameChanged,
-                               hou.nodeEventType.BeingDeleted,
-                               hou.nodeEventType.ChildCreated,
-                               hou.nodeEventType.FlagChanged)
-        self.clean_node_callbacks()
+        self.callback_types = BOOKMARK_NODE_EVENT_TYPES
+        if self.node is None:
+            self.set_disabled()
+        else:
+            self.clean_node_callbacks()
+            self.watch_node()
+
+    # bookmark data is owned by the view's store record
+
+    @property
+    def bookmark_name(self):
+        return self.record.name
+
+    @property
+    def node_path(self):
+        return self.record.node_path
+
+    @property
+    def node_name(self):
+        return self.record.node_name
+
+    @property
+    def node_session_id(self):
+        return self.record.session_id
+
+    @property
+    def color(self):
+        return self.record.color
+
+    @property
+    def text_color(self):
+        return self.record.text_color
+
+    @property
+    def uid(self):
+        return self.record.uid
+
+    def refresh_from_record(self, fields):
+        """ Called by the view when the record changed in the store.
+        """
+
+        if "name" in fields:
+            self.label.setText(self.record.name)
+
+        if "session_id" in fields:
+            n = hou.nodeBySessionId(self.record.session_id)
+            if n is not None:
+                self.clean_node_callbacks()
+                self.node = n
+                self.watch_node()
+
+        if "node_path" in fields:
+            self.setToolTip(self.record.node_path)
+            self.node_flags.node_path = self.record.node_path
+
+        if "color" in fields or "text_color" in fields:
+            self.set_colors()
+
+    def watch_node(self):
+
         self.node.addEventCallback(self.callback_types,
                                    self.node_callback)
-        self.apply_parent_callbacks()
+        ParentCallbacks.acquire(self, self.node)
 
     def clean_node_callbacks(self):
 
+        ParentCallbacks.release(self)
+        if self.node is None:
+            return
+
         try:
             for c_types, c_m in self.node.eventCallbacks():
             
-                if "Bookmark.node_callback" in str(c_m):
+                # only this row's callback, other panels watch the node too
+                if c_m == self.node_callback:
                     self.node.removeEventCallback(self.callback_types,
                                                   c_m)
         except hou.ObjectWasDeleted:
             pass
 
-    def apply_parent_callbacks(self):
-
-        n = self.node
-        while n.parent() is not None and n.parent().path() != '/':
-            p = n.parent()
-
-            safe_apply_callback(p, (hou.nodeEventType.NameChanged,),
-                                refresh_bookmarks_callbacks_renamed)
-
-            safe_apply_callback(p, (hou.nodeEventType.ChildCreated,),
-                                refresh_bookmark_callbacks_childcreated)
-
-            safe_apply_callback(p, (hou.nodeEventType.BeingDeleted,),
-                                refresh_bookmark_callbacks_parent_deleted)
-            n = p
-
     def rename_bookmark(self, node):
 
         if node is None:
             return
 
-        rename_bookmark = self.bookmark_name == self.node_name
-
         self.node = node
-        self.node_path = self.node.path()
-        self.node_name = self.node.name()
-        self.setToolTip(self.node_path)
-
-        if rename_bookmark:
-            self.bookmark_name = self.node_name
-            self.label.setText(self.node_name)
+        self.bookmarkview.rename_bookmark(self.key, node)
 
     def node_callback(self, **kwargs):
 
@@ -1229,9 +1614,7 @@ class Bookmark(QtWidgets.QFrame):
 
         elif kwargs["event_type"] == hou.nodeEventType.FlagChanged:
             
-            self.node_flags.update_display_flag(update_node=False)
-            self.node_flags.update_template_flag(update_node=False)
-            self.node_flags.update_bypass_flag(update_node=False)
+            self.node_flags.mark_dirty(kwargs["node"])
 
         elif kwargs["event_type"] == hou.nodeEventType.BeingDeleted:
 
@@ -1239,208 +1622,67 @@ class Bookmark(QtWidgets.QFrame):
             n = self.refresh_node_data(self.node_session_id)
             if n: return
 
-            try:
-                if ConfigFile.get_ui_prefs("auto_delete_bookmark"):
-                    self.remove_me(True)
-                else:
-                    self.set_disabled()
-            except:
-                pass
+            if ConfigFile.get_ui_prefs("auto_delete_bookmark"):
+                self.remove_me()
+            else:
+                self.set_disabled()
 
     def set_disabled(self):
 
         self.icon_lbl.setDisabled(True)
         self.label.setDisabled(True)
         self.node_flags.set_disabled(True)
-        self.setStyleSheet("background-color: rgb(20, 20, 20)")
+        self.setProperty("disabledNode", True)
+        self.bookmarkview.restyle(self.key)
         self.setToolTip(("Bookmark not available, "
                             "node '{}' was deleted.".format(self.node_path)))
-            
-    def copy(self, parent):
-
-        c = Bookmark(parent=parent,
-                     id=self.id,
-                     uid=self.uid,
-                     name=self.bookmark_name,
-                     node=self.node,
-                     color=self.color,
-                     text_color=self.text_color)
-        return c
-
-    def data(self):
-
-        return {"type":"bookmark",
-                "name":self.bookmark_name,
-                "node_path":self.node_path,
-                "color":self.color,
-                "text_color":self.text_color,
-                "id":self.id,
-                "session_id":self.node_session_id,
-                "uid":self.uid}
 
     def pop_menu(self):
 
-        self.menu.popup(QtGui.QCursor.pos())
-
-    def remove_me(self, refresh_ids=True):
+        self.bookmarkview.pop_context_menu(self.key, QtGui.QCursor.pos())
 
-        it = self.bookmarkview.bookmark_view_layout.itemAt(self.id + 1)
-        if it:
-            w = it.widget()
-            if hasattr(w, "interwidget"):
-                w.setParent(None)
-                w.deleteLater()
-
-        self.setParent(None)
-        self.deleteLater()
-        if self.uid in self.bookmarkview.bookmarks.keys():
-            del(self.bookmarkview.bookmarks[self.uid])
-
-        if refresh_ids:
-            self.bookmarkview.refresh_bookmark_ids()
+    def remove_me(self):
 
-        self.clean_node_callbacks()
+        self.bookmarkview.remove_record(self.key)
 
     def edit_name(self):
 
-        r, n = hou.ui.readInput("Enter a name:",
-                                buttons=["Ok", "Cancel"],
-                                initial_contents=self.bookmark_name)
-        if r == 1: return
-        self.bookmark_name = n
-        self.label.setText(n)
+        self.bookmarkview.edit_name(self.key)
 
     def set_default_col(self):
 
-        ini_entry = ""
-        if self.node_cat == "Object":
-            ini_entry = "obj"
-        elif self.node_cat == "Sop":
-            ini_entry = "sop"
-        elif self.node_cat == "Vop":
-            ini_entry = "vop"
-        elif self.node_cat == "Driver":
-            ini_entry = "out"
-        elif self.node_cat == "Cop2":
-            ini_entry = "cop"
-        elif self.node_cat == "Chop":
-            ini_entry = "chl"
-        elif self.node_cat == "Shop":
-            ini_entry = "shp"
-        else:
-            ini_entry = "oth"
-
-        if ini_entry == "": return
-        
-        ConfigFile.set_node_colors(ini_entry,
-                                   ", ".join([str(c) for c in self.color]))
+        self.bookmarkview.set_default_col(self.key)
 
     def pick_color(self):
 
-        init_col = QtGui.QColor(*self.color)
-        opt = QtWidgets.QColorDialog.DontUseNativeDialog 
-        c = QtWidgets.QColorDialog.getColor(init_col,
-                                            None,
-                                            "Pick a color",
-                                            opt)
-        if c.isValid():
-            self.color = [c.red(), c.green(), c.blue()]
-            self.set_colors()
+        self.bookmarkview.pick_color(self.key)
 
     def pick_txt_color(self):
 
-        init_col = QtGui.QColor(*self.text_color)
-        opt = QtWidgets.QColorDialog.DontUseNativeDialog 
-        c = QtWidgets.QColorDialog.getColor(init_col,
-                                            None,
-                                            "Pick a color",
-                                            opt)
-        if c.isValid():
-            self.text_color = [c.red(), c.green(), c.blue()]
-            self.set_colors()
+        self.bookmarkview.pick_txt_color(self.key)
 
     def set_colors(self):
+        """ Colors are set by the view's style sheet from the key
+            of the interned (color, text_color) pair.
+        """
 
-        bg_color = "rgb({0}, {1}, {2})".format(*self.color)
-        bg_hover_color = [c - 50 if c > 200 else c + 50 for c in self.color]
-        bg_hover_color = "rgb({0}, {1}, {2})".format(*bg_hover_color)
-        
-        text_col = "rgb({0}, {1}, {2})".format(*self.text_color)
-        text_type_col = [c - 50 if c > 60 else c for c in self.text_color]
-        text_type_col = "rgb({0}, {1}, {2})".format(*text_type_col)
-        
-        
-        self.setStyleSheet("""QFrame:QLabel #nodeTypeName{{color: {0};
-                                                           border: 0px;
-                                                           background-color: transparent}}
-
-                              QFrame:QLabel #bookmarkName{{color: {1};
-                                                           border: 0px;
-                                                           background-color: transparent;
-                                                           font-weight: bold}}
-
-                              QFrame{{background-color: {2}}}
-                              QFrame:hover{{border: 1px solid {3}}}
-                              """.format(text_type_col,
-                                         text_col,
-                                         bg_color,
-                                         bg_hover_color))
-
-    def refresh_session_id(self, node):
-
-        session_id = node.sessionId()
-        self.refresh_node_data(session_id)
+        self.setProperty("colorKey", BookmarkStyles.color_key(self.color,
+                                                              self.text_color))
+        self.bookmarkview.restyle(self.key)
 
     def refresh_node_data(self, node_session_id,
                           skip_save_hip=False):
 
-        n = hou.nodeBySessionId(node_session_id)
-        if not n:
-            return None
-        
-        # update node data as node has been found by node UI
-        self.rename_bookmark(n)
-        self.node = n
-        self.node_path = n.path()
-        self.node_name = n.name()
-        self.node_session_id = node_session_id
-        self.setToolTip(self.node_path)
-        auto_save = ConfigFile.get_ui_prefs("auto_save_to_hip")
-        if auto_save and not skip_save_hip:
-            self.bookmarkview.nodeBookmarks.save_to_hip(verbose=False)
+        n = self.bookmarkview.refresh_node_data(self.key, node_session_id,
+                                                skip_save_hip=skip_save_hip)
+        if n:
+            self.node = n
 
         return n
 
     def mouseDoubleClickEvent(self, e):
         
-        n = hou.node(self.node_path)
-
-        if not n:
-            n = self.refresh_node_data(self.node_session_id)
-
-            if not n:
-                r = hou.ui.displayMessage(("Node doesn't exist anymore,"
-                                           " delete bookmark ?"),
-                                           buttons=["Ok", "Cancel"])
-                if r == 0:
-                    self.remove_me()
-                return
-            
-        # select the node and make it current
-        n.setCurrent(True, True)
-        n.setSelected(True, True)
-
-        # get all the networkviews to be affected
-        networks = self.bookmarkview.get_linked_network()
-        for ntw in networks:
-            
-            ntw.setCurrentNode(n)
-            rect = ntw.itemRect(n)
-            ntw.frameSelection()
-            ntw.homeToSelection()
-            ntw.flashMessage(self.node_icon,
-                             n.name(),
-                             1)
+        self.bookmarkview.jump_to_node(self.key)
 
     def mouseMoveEvent(self, e):
 
@@ -1453,187 +1695,1537 @@ class Bookmark(QtWidgets.QFrame):
         
         pixmap = self.grab()
         mimeData = QtCore.QMimeData()
-        mimeData.setText("bookmark|%|" + str(self.id))
+        mimeData.setText("bookmark|%|" + str(self.key))
+
+        painter = QtGui.QPainter(pixmap)
+        painter.setCompositionMode(painter.CompositionMode_DestinationIn)
+        painter.fillRect(pixmap.rect(), QtGui.QColor(0, 0, 0, 150))
+        painter.end()
+
+        drag = QtGui.QDrag(self)
+        drag.setMimeData(mimeData)
+        drag.setPixmap(pixmap)
+        drag.setHotSpot(e.pos())
+        drag.exec_()
+
+class BookmarkViewBase(object):
+    """ Store driven bookmark operations shared by the widget view and
+        the virtualized list view. Views implement the rendering part:
+        set_disabled, refresh_flags, set_display_option, apply_filter,
+        scroll_to_record and release.
+
+        Rows are identified by their store key, which doesn't change when
+        records are inserted, removed or moved around them.
+    """
+
+    def get_linked_network(self):
+
+        return self.nodeBookmarks.linked_network_views
+
+    def get_data(self):
+        
+        return self.store.data()
+
+    def get_bookmark(self, node_path):
+
+        return self.store.find_by_path(node_path)
+
+    def get_record_node(self, key):
+
+        record = self.store.get(key)
+        if record is None or record.is_separator:
+            return None
+
+        n = None
+        if record.session_id is not None:
+            n = hou.nodeBySessionId(record.session_id)
+        if n is None and record.node_path:
+            n = hou.node(record.node_path)
+        return n
+
+    def insert_bookmark(self, node_path, idx=-1):
+
+        node = hou.node(node_path)
+        if node is None:
+            return
+
+        existing = self.store.find_by_path(node.path())
+        if existing is not None:
+            bname = existing.name
+            r = hou.ui.displayMessage(("Bookmark for this node already exists: '{}'"
+                                      "\nAdd a another one ?".format(bname)),
+                                      buttons=["Yes", "No"])
+            if r == 1: return
+
+        if ConfigFile.get_ui_prefs("ask_for_name"):
+            r, bookmark_name = hou.ui.readInput("Enter a name:",
+                                                initial_contents=node.name(),
+                                                buttons=["Ok", "Cancel"])
+            if r == 1: return
+        else:
+            bookmark_name = node.name()
+
+        self.store.insert(self.make_bookmark_record(node, bookmark_name), idx)
+
+    def make_bookmark_record(self, node, name):
+
+        return BookmarkRecord(BOOKMARK, name,
+                              uid=make_uid(node.path()),
+                              node_path=node.path(),
+                              session_id=node.sessionId(),
+                              color=get_default_color(node),
+                              text_color=list(DEFAULT_TEXT_COLOR),
+                              fingerprint=get_node_fingerprint(node))
+
+    def insert_bookmarks(self, nodes, idx=-1):
+        """ Bookmark several nodes at once: one question for the nodes
+            already bookmarked, one name pattern for all of them and a
+            single store insertion. Returns the number of bookmarks added.
+        """
+
+        if len(nodes) == 1:
+            count = len(self.store)
+            self.insert_bookmark(nodes[0].path(), idx)
+            return len(self.store) - count
+
+        existing = [n for n in nodes if self.store.find_by_path(n.path())]
+        if existing:
+            r = hou.ui.displayMessage(("{} of the {} selected nodes are already "
+                                       "bookmarked.".format(len(existing),
+                                                            len(nodes))),
+                                      buttons=["Add anyway", "Skip them", "Cancel"])
+            if r == 2: return 0
+            if r == 1:
+                nodes = [n for n in nodes if not n in existing]
+                if not nodes: return 0
+
+        pattern = NAME_PATTERN
+        if ConfigFile.get_ui_prefs("ask_for_name"):
+            r, pattern = hou.ui.readInput("Name pattern:",
+                                          initial_contents=pattern,
+                                          help=NAME_PATTERN_HELP,
+                                          buttons=["Ok", "Cancel"])
+            if r == 1: return 0
+
+        records = []
+        try:
+            for i, n in enumerate(nodes):
+                records.append(self.make_bookmark_record(n,
+                                    format_bookmark_name(pattern, n, i)))
+        except (KeyError, IndexError, ValueError) as e:
+            hou.ui.displayMessage("Invalid name pattern: " + str(e),
+                                  help=NAME_PATTERN_HELP,
+                                  severity=hou.severityType.Error)
+            return 0
+
+        self.insert_records(records, idx)
+        return len(records)
+
+    def remove_bookmarks(self, nodes):
+        """ Remove the bookmarks of the given nodes in a single store
+            transaction, returns the number of bookmarks removed.
+        """
+
+        keys = []
+        for n in nodes:
+            keys += [r.key for r in self.store.find_all_by_path(n.path())]
+
+        return len(self.remove_records(keys))
+
+    # right click menu, created on first use and shared by all the rows,
+    # the actions apply to the row it was opened on
+
+    CONTEXT_MENU_ACTIONS = {SEPARATOR:(("edit", "   Edit Label", "edit_name"),
+                                       ("color", "   Edit Children Background Color", "pick_color"),
+                                       ("text_color", "   Edit Children Label Color", "pick_txt_color"),
+                                       None,
+                                       ("remove", "   Remove Separator", "remove_record")),
+                            BOOKMARK:(("edit", "   Edit Label", "edit_name"),
+                                      ("color", "   Edit Background Color", "pick_color"),
+                                      ("text_color", "   Edit Label Color", "pick_txt_color"),
+                                      ("palette", "   Set Current BG color as default", "set_default_col"),
+                                      None,
+                                      ("remove", "   Remove Bookmark", "remove_record"))}
+
+    def context_menu(self, kind):
+
+        menu = self.context_menus.get(kind)
+        if menu is not None:
+            return menu
+
+        menu = QtWidgets.QMenu(self)
+        menu.setStyleSheet(hou.ui.qtStyleSheet())
+
+        for a in self.CONTEXT_MENU_ACTIONS[kind]:
+            if a is None:
+                menu.addSeparator()
+                continue
+            ico, label, func_name = a
+            act = menu.addAction(get_icon(ico), label)
+            act.triggered.connect(lambda checked=False, f=func_name: \
+                                  self.run_menu_action(f))
+
+        self.context_menus[kind] = menu
+        return menu
+
+    def pop_context_menu(self, key, global_pos):
+
+        record = self.store.get(key)
+        if record is None:
+            return
+
+        self.menu_key = key
+        self.context_menu(record.kind).popup(global_pos)
+
+    def run_menu_action(self, func_name):
+
+        key = self.menu_key
+        self.menu_key = None
+        if key is None or not key in self.store:
+            return
+
+        getattr(self, func_name)(key)
+
+    def insert_separator(self, idx=0):
+        
+        r, breaker_name = hou.ui.readInput("Enter a name:",
+                                            initial_contents="Separator",
+                                            buttons=["Ok", "Cancel"])
+        if r == 1: return
+
+        self.store.insert(BookmarkRecord(SEPARATOR, breaker_name), idx)
+
+    def remove_record(self, key):
+
+        self.store.remove(key)
+
+    def insert_records(self, records, position=None):
+        """ Insert a block of records in one store transaction.
+        """
+
+        return self.store.insert_many(records, position)
+
+    def remove_records(self, keys):
+        """ Remove several records in one store transaction.
+        """
+
+        return self.store.remove_many(keys)
+
+    def move_records(self, keys, position):
+        """ Move a block of records to the given drop slot, keeping
+            their order.
+        """
+
+        first = self.store.index_of(keys[0])
+        if first < position <= first + len(keys):
+            return
+
+        for k in keys:
+            position = self.store.move(k, position) + 1
+
+    def rename_bookmark(self, key, node):
+
+        record = self.store.get(key)
+
+        # if the bookmark's name is the node's name then 
+        # rename bookmark as well
+        fields = {"node_path":node.path(),
+                  "fingerprint":get_node_fingerprint(node)}
+        if record.name == record.node_name:
+            fields["name"] = node.name()
+
+        self.store.update(key, **fields)
+
+    def refresh_node_data(self, key, node_session_id,
+                          skip_save_hip=False):
+
+        n = hou.nodeBySessionId(node_session_id)
+        if not n:
+            return None
+        
+        # update node data as node has been found by node UI
+        self.rename_bookmark(key, n)
+        self.store.update(key, session_id=node_session_id)
+        if not skip_save_hip:
+            self.nodeBookmarks.auto_save_to_hip()
+
+        return n
+
+    def edit_name(self, key):
+
+        record = self.store.get(key)
+        if record.is_separator:
+            label = "Separator name:"
+        else:
+            label = "Enter a name:"
+
+        r, n = hou.ui.readInput(label,
+                                buttons=["Ok", "Cancel"],
+                                initial_contents=record.name)
+        if r == 1: return
+        self.store.update(key, name=n)
+
+    def _pick_color(self, key, field):
+        """ Edit a bookmark color, or the color of all the bookmarks
+            of a separator's section.
+        """
+
+        record = self.store.get(key)
+        if record.is_separator:
+            init_col = QtGui.QColor()
+            records = self.store.section(key)
+        else:
+            init_col = QtGui.QColor(*getattr(record, field))
+            records = [record]
+
+        opt = QtWidgets.QColorDialog.DontUseNativeDialog 
+        c = QtWidgets.QColorDialog.getColor(init_col,
+                                            None,
+                                            "Pick a color",
+                                            opt)
+        if not c.isValid():
+            return
+
+        color = [c.red(), c.green(), c.blue()]
+        for r in records:
+            self.store.update(r.key, **{field:color})
+
+    def pick_color(self, key):
+
+        self._pick_color(key, "color")
+
+    def pick_txt_color(self, key):
+
+        self._pick_color(key, "text_color")
+
+    def set_default_col(self, key):
+
+        n = self.get_record_node(key)
+        if n is None: return
+
+        cat = n.type().category().name()
+        ConfigFile.set_node_colors(get_color_entry(cat),
+                                   ", ".join([str(c) for c in \
+                                              self.store.get(key).color]))
+
+    def jump_to_node(self, key):
+
+        record = self.store.get(key)
+        n = hou.node(record.node_path)
+
+        if not n:
+            n = self.refresh_node_data(key, record.session_id)
+
+            if not n:
+                r = hou.ui.displayMessage(("Node doesn't exist anymore,"
+                                           " delete bookmark ?"),
+                                           buttons=["Ok", "Cancel"])
+                if r == 0:
+                    self.remove_record(key)
+                return
+            
+        # select the node and make it current
+        n.setCurrent(True, True)
+        n.setSelected(True, True)
+
+        # get all the networkviews to be affected
+        networks = self.get_linked_network()
+        for ntw in networks:
+            
+            ntw.setCurrentNode(n)
+            ntw.frameSelection()
+            ntw.homeToSelection()
+            ntw.flashMessage(n.type().icon(),
+                             n.name(),
+                             1)
+
+class BookmarkView(QtWidgets.QWidget, BookmarkViewBase):
+
+    def __init__(self, parent=None, store=None):
+        super(BookmarkView, self).__init__(parent=parent)
+
+        self.setProperty("houdiniStyle", True)
+        self.setAcceptDrops(True)
+        self.nodeBookmarks = parent
+
+        # bookmarks and separators data, the widgets are rendered from it
+        if store is None:
+            store = BookmarkStore()
+        self.store = store
+
+        # record key => row widget / row's trailing drop zone
+        self.widgets = {}
+        self.interwidgets = {}
+
+        # keys of the bookmarks hidden by the filter
+        self.filtered = set()
+
+        self.context_menus = {}
+        self.menu_key = None
+
+        self.bookmark_view_layout = QtWidgets.QVBoxLayout()
+        self.bookmark_view_layout.setSpacing(1)
+        self.bookmark_view_layout.setAlignment(Qt.AlignTop)
+        self.bookmark_view_layout.addWidget(InterWidget(self))
+        
+        self.setLayout(self.bookmark_view_layout)
+
+        # rows are styled by the shared style sheet, restyled rows are
+        # repolished together at the next event loop iteration
+        self.style_version = None
+        self.restyle_pending = set()
+        self.restyle_timer = QtCore.QTimer(self)
+        self.restyle_timer.setSingleShot(True)
+        self.restyle_timer.timeout.connect(self.flush_restyle)
+        self.apply_style_sheet()
+
+        for i, record in enumerate(self.store):
+            self.create_row(record, i)
+
+        self.store.subscribe(self.on_store_changed)
+
+    def on_store_changed(self, op, key, info):
+
+        if op == "insert":
+            self.create_row(self.store.get(key), info["position"])
+
+        elif op == "insert_many":
+            # the layout is updated once for the whole block
+            self.setUpdatesEnabled(False)
+            position = info["position"]
+            for i, k in enumerate(info["keys"]):
+                self.create_row(self.store.get(k), position + i)
+            self.setUpdatesEnabled(True)
+
+        elif op == "remove":
+            self.delete_row(key)
+            self.filtered.discard(key)
+
+        elif op == "remove_many":
+            self.setUpdatesEnabled(False)
+            for _, record in info["removed"]:
+                self.delete_row(record.key)
+                self.filtered.discard(record.key)
+            self.setUpdatesEnabled(True)
+
+        elif op == "move":
+            self.move_row(key, info["new"])
+
+        elif op == "update":
+            w = self.widgets.get(key)
+            if w is not None:
+                w.refresh_from_record(info["fields"])
+
+        elif op == "clear":
+            for k in list(self.widgets.keys()):
+                self.delete_row(k)
+            self.filtered = set()
+
+    def create_row(self, record, position):
+        """ Layout is [drop zone, row, drop zone, row, drop zone ...]
+            so a record at store position p is at layout index 2p + 1.
+        """
+
+        if record.is_separator:
+            w = Separator(record, parent=self)
+        else:
+            w = Bookmark(record=record, parent=self)
+
+        inter_w = InterWidget(self)
+        inter_w.key = record.key
+
+        self.widgets[record.key] = w
+        self.interwidgets[record.key] = inter_w
+
+        idx = position * 2 + 1
+        self.bookmark_view_layout.insertWidget(idx, w)
+        self.bookmark_view_layout.insertWidget(idx + 1, inter_w)
+
+    def apply_style_sheet(self):
+
+        self.style_version = BookmarkStyles.version
+        self.setStyleSheet(BookmarkStyles.style_sheet())
+
+    def restyle(self, key):
+
+        self.restyle_pending.add(key)
+        if not self.restyle_timer.isActive():
+            self.restyle_timer.start(0)
+
+    def flush_restyle(self):
+
+        # rows not polished yet get their style when shown
+        pending = [self.widgets[k] for k in self.restyle_pending \
+                   if k in self.widgets and \
+                   self.widgets[k].testAttribute(Qt.WA_WState_Polished)]
+        self.restyle_pending = set()
+
+        # only new color pairs need the sheet, which repolishes all the
+        # rows, otherwise the cost is the restyled rows only
+        if self.style_version != BookmarkStyles.version:
+            self.apply_style_sheet()
+            return
+
+        for w in pending:
+            repolish_widget(w)
+            for c in w.findChildren(QtWidgets.QWidget):
+                repolish_widget(c)
+
+    def delete_row(self, key):
+
+        w = self.widgets.pop(key, None)
+        inter_w = self.interwidgets.pop(key, None)
+
+        for _w in (w, inter_w):
+            if _w is None: continue
+            _w.setParent(None)
+            _w.deleteLater()
+
+        if hasattr(w, "clean_node_callbacks"):
+            w.clean_node_callbacks()
+
+    def move_row(self, key, position):
+
+        w = self.widgets[key]
+        inter_w = self.interwidgets[key]
+
+        self.bookmark_view_layout.removeWidget(w)
+        self.bookmark_view_layout.removeWidget(inter_w)
+
+        idx = position * 2 + 1
+        self.bookmark_view_layout.insertWidget(idx, w)
+        self.bookmark_view_layout.insertWidget(idx + 1, inter_w)
+
+    def apply_filter(self, keys):
+        """ Show only the given bookmarks, all if keys is None. Only the
+            rows whose filtered state changed are shown or hidden.
+        """
+
+        if keys is None:
+            filtered = set()
+        else:
+            filtered = set(r.key for r in self.store.bookmarks() \
+                           if not r.key in keys)
+
+        changed = filtered ^ self.filtered
+        self.filtered = filtered
+
+        for key in changed:
+            w = self.widgets.get(key)
+            if w is None or w.collapsed:
+                continue
+            w.setVisible(not key in filtered)
+
+    def scroll_to_record(self, key):
+
+        w = self.widgets.get(key)
+        if w is None:
+            return
+
+        p = self.parentWidget()
+        while p is not None and not isinstance(p, QtWidgets.QScrollArea):
+            p = p.parentWidget()
+        if p is not None:
+            p.ensureWidgetVisible(w)
+
+    def dragMoveEvent(self, e):
+        
+        e.acceptProposedAction()
+
+    def dropEvent(self, e):
+        
+        e.acceptProposedAction()
+        src_w = e.source()
+        data = e.mimeData()
+        node_path = data.text()
+        
+        if isinstance(src_w, AddSeparator):
+            self.insert_separator(len(self.store))
+            return True
+
+        self.insert_bookmark(node_path)
+        return True
+
+    def get_bookmark_widgets(self):
+
+        return [self.widgets[r.key] for r in self.store.bookmarks()]
+
+    def set_disabled(self, key):
+
+        self.widgets[key].set_disabled()
+
+    def refresh_flags(self, key):
+
+        w = self.widgets[key]
+        w.node_flags.node_path = w.node_path
+        w.node_flags.mark_dirty()
+
+    def set_display_option(self, option, state):
+
+        for w in self.get_bookmark_widgets():
+
+            if option == "show_icon":
+                w.icon_lbl.setVisible(state)
+            elif option == "show_label":
+                w.label.setVisible(state)
+            elif option == "show_type":
+                w.type_name_label.setVisible(state)
+            elif option == "show_flags":
+                w.node_flags.setVisible(state)
+
+    def release(self):
+        """ Called when the view is replaced, the store is kept.
+        """
+
+        self.store.unsubscribe(self.on_store_changed)
+        for w in self.get_bookmark_widgets():
+            w.clean_node_callbacks()
+        
+class BookmarkListModel(QtCore.QAbstractListModel):
+    """ Qt list model over a BookmarkStore, one row per record.
+        Rows are only painted by the view when they are visible.
+
+        The store notifies its changes once done, the model keeps the keys
+        of its rows and applies each change to them between the begin and
+        end calls, so the views only see the rows change at that point.
+    """
+
+    MIME_TYPE = "application/x-houdini-node-bookmarks-keys"
+
+    def __init__(self, store, parent=None):
+        super(BookmarkListModel, self).__init__(parent)
+
+        self.store = store
+        self.rows = store.keys()
+        self.store.subscribe(self.on_store_changed)
+
+    def release(self):
+
+        self.store.unsubscribe(self.on_store_changed)
+
+    def on_store_changed(self, op, key, info):
+
+        root = QtCore.QModelIndex()
+
+        if op == "insert":
+            p = info["position"]
+            self.beginInsertRows(root, p, p)
+            self.rows.insert(p, key)
+            self.endInsertRows()
+
+        elif op == "insert_many":
+            p = info["position"]
+            self.beginInsertRows(root, p, p + len(info["keys"]) - 1)
+            self.rows[p:p] = info["keys"]
+            self.endInsertRows()
+
+        elif op == "remove":
+            p = info["position"]
+            self.beginRemoveRows(root, p, p)
+            del(self.rows[p])
+            self.endRemoveRows()
+
+        elif op == "remove_many":
+            # contiguous rows are removed together, from the last ones
+            # so the positions of the others stay valid
+            ranges = []
+            for p, _ in info["removed"]:
+                if ranges and ranges[-1][1] == p - 1:
+                    ranges[-1][1] = p
+                else:
+                    ranges.append([p, p])
+            for first, last in reversed(ranges):
+                self.beginRemoveRows(root, first, last)
+                del(self.rows[first:last + 1])
+                self.endRemoveRows()
+
+        elif op == "move":
+            old = info["old"]
+            new = info["new"]
+            dest = new + 1 if new > old else new
+            self.beginMoveRows(root, old, old, root, dest)
+            self.rows.insert(new, self.rows.pop(old))
+            self.endMoveRows()
+
+        elif op == "update":
+            idx = self.index(self.store.index_of(key), 0)
+            self.dataChanged.emit(idx, idx)
+
+        elif op == "clear":
+            self.beginResetModel()
+            self.rows = []
+            self.endResetModel()
+
+    def record(self, index):
+        """ Record of the row, None if it was removed from the store and
+            the row not yet.
+        """
+
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        return self.store.get(self.rows[index.row()])
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+
+        record = self.record(index)
+        if record is None:
+            return None
+
+        if role == Qt.DisplayRole:
+            return record.name
+
+        if role == Qt.ToolTipRole and not record.is_separator:
+            return record.node_path
+
+        return None
+
+    def flags(self, index):
+
+        # drops are only allowed between rows
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled
+
+    def supportedDropActions(self):
+
+        return Qt.MoveAction | Qt.CopyAction
+
+    def mimeTypes(self):
+
+        return [self.MIME_TYPE, "text/plain"]
+
+class BookmarkDelegate(QtWidgets.QStyledItemDelegate):
+    """ Paints bookmark and separator rows of the list view, handles the
+        clicks on separator's collapse arrow and on node flags.
+    """
+
+    ROW_HEIGHT = 30
+    FLAG_WIDTH = 18
+
+    # flag name, node method telling if it's available, icon, "on" color
+    FLAGS = (("bypass", "bypass", "NETVIEW_bypass_flag", "#b6a642"),
+             ("template", "setTemplateFlag", "NETVIEW_template_flag", "#dd7dd7"),
+             ("display", "setDisplayFlag", "NETVIEW_display_flag", "#0489bc"))
+
+    def __init__(self, view):
+        super(BookmarkDelegate, self).__init__(view)
+
+        self.view = view
+
+    def sizeHint(self, option, index):
+
+        return QtCore.QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def arrow_rect(self, rect):
+
+        return QtCore.QRect(rect.left() + 4, rect.center().y() - 9, 18, 18)
+
+    def flag_rects(self, rect, node):
+
+        flags = [f for f in self.FLAGS if hasattr(node, f[1])]
+
+        rects = []
+        x = rect.right() - 1 - len(flags) * (self.FLAG_WIDTH + 2)
+        for f in flags:
+            rects.append((f, QtCore.QRect(x, rect.top() + 1,
+                                          self.FLAG_WIDTH, rect.height() - 2)))
+            x += self.FLAG_WIDTH + 2
+
+        return rects
+
+    def paint(self, painter, option, index):
+
+        record = index.model().record(index)
+        if record is None:
+            return
+
+        rect = option.rect.adjusted(0, 1, 0, -1)
+
+        painter.save()
+        try:
+            if record.is_separator:
+                self.paint_separator(painter, option, rect, record)
+            else:
+                self.paint_bookmark(painter, option, rect, record)
+        finally:
+            painter.restore()
+
+    def paint_separator(self, painter, option, rect, record):
+
+        collapsed = record.key in self.view.collapsed
+        
+        arrow = self.arrow_rect(rect)
+        ico = "right" if collapsed else "down"
+        get_icon(ico).paint(painter, arrow)
+        x = arrow.right() + 6
+
+        painter.setPen(option.palette.color(QtGui.QPalette.WindowText))
+        fm = QtGui.QFontMetrics(option.font)
+
+        label = record.name
+        if collapsed:
+            label = "(" + str(self.view.store.section_size(record.key)) + ")  " + label
+
+        painter.drawText(QtCore.QRect(x, rect.top(), rect.right() - x, rect.height()),
+                         Qt.AlignLeft | Qt.AlignVCenter, label)
+        x += fm.width(label) + 6
+
+        if x < rect.right() - 5:
+            painter.setPen(QtGui.QPen(QtGui.QColor(20, 20, 20), 2))
+            painter.drawLine(x, rect.center().y(), rect.right() - 5, rect.center().y())
+
+    def paint_bookmark(self, painter, option, rect, record):
+
+        node = self.view.get_node(record.key)
+        disabled = node is None or record.key in self.view.disabled
+        opts = self.view.display_options
+
+        if disabled:
+            painter.fillRect(rect, QtGui.QColor(20, 20, 20))
+        else:
+            painter.fillRect(rect, QtGui.QColor(*record.color))
+
+            if option.state & QtWidgets.QStyle.State_MouseOver:
+                hover = [c - 50 if c > 200 else c + 50 for c in record.color]
+                painter.setPen(QtGui.QColor(*hover))
+                painter.drawRect(rect.adjusted(0, 0, -1, -1))
+
+        x = rect.left() + 5
+        cy = rect.center().y()
+
+        if opts["show_icon"] and node is not None:
+            self.view.get_type_icon(node).paint(painter,
+                                                QtCore.QRect(x, cy - 11, 22, 22))
+            x += 27
+
+        flags = []
+        if opts["show_flags"] and not disabled:
+            flags = self.flag_rects(rect, node)
+
+        right = rect.right() - 5
+        if flags:
+            right = flags[0][1].left() - 5
+
+        text_color = QtGui.QColor(*record.text_color)
+        if disabled:
+            text_color = text_color.darker(200)
+
+        if opts["show_label"] and right > x:
+            font = QtGui.QFont(option.font)
+            font.setBold(True)
+            fm = QtGui.QFontMetrics(font)
+            text = fm.elidedText(record.name, Qt.ElideRight, right - x)
+
+            painter.setFont(font)
+            painter.setPen(text_color)
+            painter.drawText(QtCore.QRect(x, rect.top(), right - x, rect.height()),
+                             Qt.AlignLeft | Qt.AlignVCenter, text)
+            x += fm.width(text) + 5
+
+        if opts["show_type"] and node is not None and right > x:
+            type_col = [c - 50 if c > 60 else c for c in record.text_color]
+            fm = QtGui.QFontMetrics(option.font)
+            text = fm.elidedText('(' + node.type().name() + ')',
+                                 Qt.ElideRight, right - x)
+
+            painter.setFont(option.font)
+            painter.setPen(QtGui.QColor(*type_col))
+            painter.drawText(QtCore.QRect(x, rect.top(), right - x, rect.height()),
+                             Qt.AlignLeft | Qt.AlignVCenter, text)
+
+        for f, r in flags:
+            name, _, icon, on_color = f
+
+            if get_node_flag(node, name):
+                painter.fillRect(r, QtGui.QColor(on_color))
+            else:
+                painter.fillRect(r, QtGui.QColor("#4b4b4b"))
+
+            painter.setPen(QtGui.QColor(0, 0, 0))
+            painter.drawRect(r.adjusted(0, 0, -1, -1))
+            get_houdini_icon(icon).paint(painter,
+                                         QtCore.QRect(r.center().x() - 5,
+                                                      r.center().y() - 6,
+                                                      12, 12))
+
+    def editorEvent(self, event, model, option, index):
+
+        if event.type() != QtCore.QEvent.MouseButtonRelease or \
+           event.button() != Qt.LeftButton:
+            return False
+
+        record = model.record(index)
+        if record is None:
+            return False
+
+        rect = option.rect.adjusted(0, 1, 0, -1)
+
+        if record.is_separator:
+            if self.arrow_rect(rect).contains(event.pos()):
+                self.view.collapse(record.key)
+                return True
+            return False
+
+        if not self.view.display_options["show_flags"] or \
+           record.key in self.view.disabled:
+            return False
+
+        node = self.view.get_node(record.key)
+        if node is None:
+            return False
+
+        for f, r in self.flag_rects(rect, node):
+            if r.contains(event.pos()):
+                toggle_node_flag(node, f[0])
+                self.view.refresh_flags(record.key)
+                return True
+
+        return False
+
+class BookmarkListView(QtWidgets.QListView, BookmarkViewBase):
+    """ Virtualized bookmark view, rows are painted by a delegate from
+        the store's records instead of having one widget per bookmark.
+    """
+
+    def __init__(self, parent=None, store=None):
+        super(BookmarkListView, self).__init__(parent=parent)
+
+        self.setProperty("houdiniStyle", True)
+        self.nodeBookmarks = parent
+
+        if store is None:
+            store = BookmarkStore()
+        self.store = store
+
+        self.nodes = {}
+        self.watched_nodes = {}
+        self.context_menus = {}
+        self.menu_key = None
+        self.disabled = set()
+        self.collapsed = set()
+        self.filtered = set()
+        self.display_options = dict((o, ConfigFile.get_display_pref(o)) for o in \
+                                    ("show_icon", "show_label",
+                                     "show_type", "show_flags"))
+
+        self.list_model = BookmarkListModel(self.store, self)
+        self.setModel(self.list_model)
+        self.setItemDelegate(BookmarkDelegate(self))
+
+        self.setUniformItemSizes(True)
+        self.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerPixel)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.setMouseTracking(True)
+        self.viewport().setAttribute(Qt.WA_Hover, True)
+
+        self.setDragEnabled(True)
+        self.setAcceptDrops(True)
+        self.setDropIndicatorShown(True)
+        self.setDragDropMode(QtWidgets.QAbstractItemView.DragDrop)
+        self.setDefaultDropAction(Qt.MoveAction)
+
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.pop_menu)
+        self.doubleClicked.connect(self.on_double_clicked)
+        self.entered.connect(self.show_node_status)
+
+        for record in self.store.bookmarks():
+            self.watch_node(record.key)
+
+        self.store.subscribe(self.on_store_changed)
+
+    def on_store_changed(self, op, key, info):
+
+        if op == "insert":
+            self.record_inserted(key)
+
+        elif op == "insert_many":
+            for k in info["keys"]:
+                self.record_inserted(k)
+
+        elif op == "remove":
+            if self.record_removed(info["record"]):
+                self.refresh_visibility()
+
+        elif op == "remove_many":
+            refresh = False
+            for _, record in info["removed"]:
+                refresh = self.record_removed(record) or refresh
+            if refresh:
+                self.refresh_visibility()
+
+        elif op == "move":
+            if self.collapsed:
+                self.refresh_row_visibility(key)
+
+        elif op == "update":
+            if "session_id" in info["fields"]:
+                self.nodes.pop(key, None)
+                self.disabled.discard(key)
+                self.watch_node(key)
+                self.unwatch_node(info["previous"]["session_id"])
+
+        elif op == "clear":
+            for session_id in list(self.watched_nodes.keys()):
+                self.unwatch_node(session_id)
+            self.nodes = {}
+            self.disabled = set()
+            self.collapsed = set()
+            self.filtered = set()
+
+    def record_inserted(self, key):
+
+        record = self.store.get(key)
+        if not record.is_separator:
+            self.watch_node(key)
+        if self.collapsed:
+            self.refresh_row_visibility(key)
+
+    def record_removed(self, record):
+        """ Returns True if the rows visibility must be refreshed.
+        """
+
+        key = record.key
+        self.nodes.pop(key, None)
+        self.disabled.discard(key)
+        self.filtered.discard(key)
+        if record.is_separator:
+            self.collapsed.discard(key)
+            return True
+
+        self.unwatch_node(record.session_id)
+        return False
+
+    def release(self):
+
+        self.store.unsubscribe(self.on_store_changed)
+        self.list_model.release()
+        for session_id in list(self.watched_nodes.keys()):
+            self.unwatch_node(session_id, force=True)
+
+    # nodes
+
+    def get_node(self, key):
+
+        n = self.nodes.get(key)
+        if n is not None:
+            try:
+                n.sessionId()
+                return n
+            except hou.ObjectWasDeleted:
+                del(self.nodes[key])
+
+        n = self.get_record_node(key)
+        if n is not None:
+            self.nodes[key] = n
+        return n
+
+    def get_type_icon(self, node):
+
+        return get_houdini_icon(get_type_icon_name(node.type()))
+
+    def watch_node(self, key):
+
+        n = self.get_node(key)
+        if n is None:
+            return
+
+        session_id = n.sessionId()
+        if session_id in self.watched_nodes:
+            return
+
+        self.watched_nodes[session_id] = n
+        n.addEventCallback(BOOKMARK_NODE_EVENT_TYPES, self.node_callback)
+        ParentCallbacks.acquire((id(self), session_id), n)
+
+    def unwatch_node(self, session_id, force=False):
+
+        if not force and self.store.find_by_session_id(session_id):
+            return
+
+        n = self.watched_nodes.pop(session_id, None)
+        if n is None:
+            return
+
+        ParentCallbacks.release((id(self), session_id))
+
+        try:
+            for c_types, c_m in n.eventCallbacks():
+                if c_m == self.node_callback:
+                    n.removeEventCallback(c_types, c_m)
+        except hou.ObjectWasDeleted:
+            pass
+
+    def node_callback(self, **kwargs):
+
+        node = kwargs["node"]
+        event_type = kwargs["event_type"]
+
+        try:
+            session_id = node.sessionId()
+        except hou.ObjectWasDeleted:
+            return
+
+        keys = [r.key for r in self.store.find_all_by_session_id(session_id)]
+
+        if event_type == hou.nodeEventType.NameChanged:
+            for k in keys:
+                self.rename_bookmark(k, node)
+
+        elif event_type == hou.nodeEventType.FlagChanged:
+            for k in keys:
+                self.refresh_flags(k)
+
+        elif event_type == hou.nodeEventType.BeingDeleted:
+            # the node can be moved and not deleted, check once done
+            hdefereval.executeDeferred(lambda: self.check_deleted_nodes(keys))
+
+    def check_deleted_nodes(self, keys):
+
+        deleted = []
+        for k in keys:
+            if not k in self.store: continue
+
+            self.nodes.pop(k, None)
+            if self.get_node(k) is not None: continue
+
+            if ConfigFile.get_ui_prefs("auto_delete_bookmark"):
+                deleted.append(k)
+            else:
+                self.set_disabled(k)
+
+        self.remove_records(deleted)
+
+    # rendering
+
+    def update_row(self, key):
+
+        self.update(self.list_model.index(self.store.index_of(key), 0))
+
+    def set_disabled(self, key):
+
+        self.disabled.add(key)
+        self.update_row(key)
+
+    def refresh_flags(self, key):
+
+        self.update_row(key)
+
+    def set_display_option(self, option, state):
+
+        self.display_options[option] = state
+        self.viewport().update()
+
+    def is_row_hidden(self, record, collapsed):
+
+        if record.is_separator:
+            return False
+        return collapsed or record.key in self.filtered
+
+    def refresh_row_visibility(self, key):
+
+        record = self.store.get(key)
+        section = self.store.section_of(key)
+        collapsed = section is not None and section.key in self.collapsed
+
+        row = self.store.index_of(key)
+        hidden = self.is_row_hidden(record, collapsed)
+        if self.isRowHidden(row) != hidden:
+            self.setRowHidden(row, hidden)
+
+    def refresh_visibility(self):
+
+        collapsed = False
+        for row, record in enumerate(self.store):
+            if record.is_separator:
+                collapsed = record.key in self.collapsed
+            hidden = self.is_row_hidden(record, collapsed)
+            if self.isRowHidden(row) != hidden:
+                self.setRowHidden(row, hidden)
+
+    def collapse(self, key):
+
+        if key in self.collapsed:
+            self.collapsed.discard(key)
+        else:
+            self.collapsed.add(key)
+
+        for r in self.store.section(key):
+            self.refresh_row_visibility(r.key)
+        self.update_row(key)
+
+    def apply_filter(self, keys):
+
+        if keys is None:
+            filtered = set()
+        else:
+            filtered = set(r.key for r in self.store.bookmarks() \
+                           if not r.key in keys)
+
+        changed = filtered ^ self.filtered
+        self.filtered = filtered
+
+        if len(changed) > len(self.store) // 4:
+            self.refresh_visibility()
+        else:
+            for key in changed:
+                self.refresh_row_visibility(key)
+
+    def scroll_to_record(self, key):
+
+        if not key in self.store:
+            return
+        self.scrollTo(self.list_model.index(self.store.index_of(key)))
+
+    # interactions
+
+    def on_double_clicked(self, index):
+
+        record = self.list_model.record(index)
+        if record is None or record.is_separator:
+            return
+        self.jump_to_node(record.key)
+
+    def show_node_status(self, index):
+
+        record = self.list_model.record(index)
+        if record is None or record.is_separator:
+            return
+
+        msg = "Node: " + record.node_path
+        self.nodeBookmarks.statusBar.showMessage(msg, 1500)
+
+    def pop_menu(self, pos):
+
+        record = self.list_model.record(self.indexAt(pos))
+        if record is None:
+            return
+
+        self.pop_context_menu(record.key, self.viewport().mapToGlobal(pos))
+
+    def startDrag(self, supported_actions):
+
+        index = self.currentIndex()
+        record = self.list_model.record(index)
+        if record is None:
+            return
+
+        # a collapsed separator is moved with its children
+        keys = [record.key]
+        if record.is_separator and record.key in self.collapsed:
+            keys += [r.key for r in self.store.section(record.key)]
+
+        mimeData = QtCore.QMimeData()
+        mimeData.setData(BookmarkListModel.MIME_TYPE,
+                         QtCore.QByteArray(" ".join([str(k) for k in keys]).encode("utf-8")))
+        if not record.is_separator:
+            mimeData.setText(record.node_path)
+
+        rect = self.visualRect(index)
+        pixmap = self.viewport().grab(rect)
+
+        painter = QtGui.QPainter(pixmap)
+        painter.setCompositionMode(painter.CompositionMode_DestinationIn)
+        painter.fillRect(pixmap.rect(), QtGui.QColor(0, 0, 0, 150))
+        painter.end()
+
+        drag = QtGui.QDrag(self)
+        drag.setMimeData(mimeData)
+        drag.setPixmap(pixmap)
+        drag.setHotSpot(self.viewport().mapFromGlobal(QtGui.QCursor.pos()) - \
+                        rect.topLeft())
+        drag.exec_(Qt.MoveAction | Qt.CopyAction, Qt.MoveAction)
+
+    def drop_row(self, e):
+
+        index = self.indexAt(e.pos())
+        record = self.list_model.record(index)
+        if record is None:
+            return len(self.store)
+
+        if self.dropIndicatorPosition() != QtWidgets.QAbstractItemView.BelowItem:
+            return index.row()
+
+        # dropped below a collapsed separator, goes at the end of the section
+        if record.is_separator and record.key in self.collapsed:
+            return index.row() + self.store.section_size(record.key) + 1
+
+        return index.row() + 1
+
+    def dropEvent(self, e):
+
+        row = self.drop_row(e)
+        src_w = e.source()
+        data = e.mimeData()
+
+        if isinstance(src_w, AddSeparator):
+            self.insert_separator(row)
+
+        elif src_w is self and data.hasFormat(BookmarkListModel.MIME_TYPE):
+            keys = data.data(BookmarkListModel.MIME_TYPE).data().decode("utf-8")
+            keys = [int(k) for k in keys.split() if int(k) in self.store]
+            if keys:
+                self.move_records(keys, row)
+
+        elif data.hasText():
+            self.insert_bookmark(data.text(), row)
+
+        # the move is already done, the drag source must not remove the rows
+        e.setDropAction(Qt.CopyAction)
+        e.accept()
+        self.setState(QtWidgets.QAbstractItemView.NoState)
+        self.viewport().update()
+
+        self.nodeBookmarks.auto_save_to_hip()
+
+def get_node_fingerprint(node):
+
+    parent = node.parent()
+    parent_type = parent.type().name() if parent is not None else ""
+    return NodeResolver.make_fingerprint(node.type().name(), parent_type,
+                                         node.name())
+
+def describe_node(node):
+
+    return node.path(), get_node_fingerprint(node)
+
+def get_scene_nodes(names):
+    """ Scene nodes with one of the given names, the scene is traversed
+        once.
+    """
+
+    return [n for n in hou.node('/').allSubChildren(recurse_in_locked_nodes=False) \
+            if n.name() in names]
+
+def walk_scene_nodes():
+    """ Scene nodes depth first, locked assets contents excluded, as a
+        generator so the traversal can be spread over several time slices.
+    """
+
+    # nodes can be deleted between two slices
+    stack = [hou.node('/')]
+    while stack:
+        try:
+            children = stack.pop().children()
+        except hou.ObjectWasDeleted:
+            continue
+
+        for child in children:
+            yield child
+            try:
+                if not child.isLockedHDA():
+                    stack.append(child)
+            except hou.ObjectWasDeleted:
+                pass
 
-        painter = QtGui.QPainter(pixmap)
-        painter.setCompositionMode(painter.CompositionMode_DestinationIn)
-        painter.fillRect(pixmap.rect(), QtGui.QColor(0, 0, 0, 150))
-        painter.end()
+def resolve_bookmarks_data(bookmarks):
+    """ Resolve the nodes of all the bookmarks data entries at once, by
+        session id, path and fingerprint. Returns a NodeResolver.ResolveResult.
+    """
 
-        drag = QtGui.QDrag(self)
-        drag.setMimeData(mimeData)
-        drag.setPixmap(pixmap)
-        drag.setHotSpot(e.pos())
-        drag.exec_()
+    return NodeResolver.resolve_entries(bookmarks,
+                                        describe_node,
+                                        hou.nodeBySessionId,
+                                        hou.node,
+                                        get_scene_nodes)
 
-class BookmarkView(QtWidgets.QWidget):
+def resolve_bookmark_record(bkm, node=None):
+    """ Record from a .bkm / hip data entry and its resolved node, None if
+        the entry is invalid or if the node is not found.
+    """
 
-    def __init__(self, parent= None):
-        super(BookmarkView, self).__init__(parent=parent)
+    record = BookmarkRecord.from_data(bkm)
 
-        self.setProperty("houdiniStyle", True)
-        self.setAcceptDrops(True)
-        self.nodeBookmarks = parent
+    if record is None:
+        print("Invalid bkm, no type found")
+        return None
 
-        self.bookmarks = {}
+    if record.is_separator:
+        return record
 
-        self.bookmark_view_layout = QtWidgets.QVBoxLayout()
-        self.bookmark_view_layout.setSpacing(1)
-        self.bookmark_view_layout.setAlignment(Qt.AlignTop)
-        self.bookmark_view_layout.addWidget(InterWidget(self))
-        
-        self.setLayout(self.bookmark_view_layout)
+    if node is None:
+        print("Node '{}' not found in scene,"
+              " bookmark '{}' skipped".format(record.node_path,
+                                              record.name))
+        return None
 
-    def reset_filter(self):
+    record.node_path = node.path()
+    record.session_id = node.sessionId()
+    record.fingerprint = get_node_fingerprint(node)
+    record.color = bkm.get("color", [0,0,0])
+    record.text_color = bkm.get("text_color", [0,0,0])
 
-        for bkm in self.bookmarks.values():
+    return record
 
-            if not bkm.collapsed:
+class BookmarkLoader(QtCore.QObject):
+    """ Resolves bookmarks data entries and inserts them in the store by
+        time slices on the Qt event loop, so the UI stays responsive while
+        a large set is loaded.
 
-                bkm.show()
+        Entries found by session id or path are inserted as they are
+        resolved. If some are not, the scene is then traversed, also by
+        slices, to find them by fingerprint and insert them at their place.
+    """
 
-    def update_filter(self, filter, mode):
-        
-        filter = str(filter)
+    SLICE_BUDGET = 0.015  # seconds of work per event loop iteration
 
-        if filter.strip() == "":
-            self.reset_filter()
-            return
+    progress = QtCore.Signal(int, int)
+    finished = QtCore.Signal(bool)
 
-        for bkm in self.bookmarks.values():
+    def __init__(self, bookmarks, store, parent=None):
+        super(BookmarkLoader, self).__init__(parent)
 
-            if not bkm.collapsed:
+        self.bookmarks = bookmarks
+        self.store = store
+        self.current = 0
+        self.running = False
+        self.resolution = NodeResolver.ResolveResult()
 
-                if mode == "bookmark":
-                    if filter in bkm.bookmark_name:
-                        bkm.show()
-                    else:
-                        bkm.hide()
+        self.matcher = NodeResolver.FingerprintMatcher(describe_node)
+        self.pending = []
+        self.scene = None
 
-                else:
-                    if filter in bkm.node_name:
-                        bkm.show()
-                    else:
-                        bkm.hide()
+        # entries inserted, ascending, the store position of an entry
+        # found later is the count of the ones before it
+        self.inserted = []
+        self.base = len(store)
 
-    def dragMoveEvent(self, e):
-        
-        e.acceptProposedAction()
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.load_slice)
 
-    def dropEvent(self, e):
-        
-        e.acceptProposedAction()
-        src_w = e.source()
-        data = e.mimeData()
-        node_path = data.text()
-        
-        if isinstance(src_w, AddSeparator):
-            self.insert_separator(len(self.children()))
-            return True
+    def start(self):
+        """ The first slice is loaded right away, small sets don't need to
+            wait for the event loop.
+        """
 
-        self.insert_bookmark(node_path,
-                             len(self.children()))  
-        return True
+        self.running = True
+        self.load_slice()
 
-    def move_widget(self, widget, idx):
+    def cancel(self):
 
-        self.bookmark_view_layout.removeWidget(widget)
-        self.bookmark_view_layout.insertWidget(widget, idx)
-        self.refresh_bookmark_ids()
-              
-    def insert_bookmark(self, node_path, idx=-1):
+        if not self.running:
+            return
 
-        h_node_path = hashlib.sha1(node_path.encode("utf-8"))
-        h_node_path = h_node_path.hexdigest()
+        self.running = False
+        self.timer.stop()
+        self.finished.emit(False)
 
-        if h_node_path in self.bookmarks.keys():
-            bname = self.bookmarks[h_node_path].bookmark_name
-            r = hou.ui.displayMessage(("Bookmark for this node already exists: '{}'"
-                                      "\nAdd a another one ?".format(bname)),
-                                      buttons=["Yes", "No"])
-            if r == 1: return
+    def load_slice(self):
 
-        node = hou.node(node_path)
-        if node is None:
+        if not self.running:
             return
 
-        if ConfigFile.get_ui_prefs("ask_for_name"):
-            r, bookmark_name = hou.ui.readInput("Enter a name:",
-                                                initial_contents=node.name(),
-                                                buttons=["Ok", "Cancel"])
-            if r == 1: return
+        count = len(self.bookmarks)
+        deadline = time.time() + self.SLICE_BUDGET
+
+        try:
+            if self.current < count:
+                self.load_entries(deadline)
+            else:
+                self.scan_scene(deadline)
+        except Exception as e:
+            self.running = False
+            hou.ui.displayMessage("Invalid data: " + str(e),
+                                  severity=hou.severityType.Error)
+            self.finished.emit(False)
+            return
+
+        self.progress.emit(self.current, count)
+
+        if self.current < count or self.scene is not None:
+            self.timer.start(0)
         else:
-            bookmark_name = node.name()
+            self.running = False
+            self.finished.emit(True)
 
-        if idx == -1:
-            idx = self.bookmark_view_layout.count()
+    def load_entries(self, deadline):
 
-        bookmark = Bookmark(node=node,
-                            uid=h_node_path,
-                            name=bookmark_name,
-                            parent=self,
-                            id=idx)
+        count = len(self.bookmarks)
+        records = []
 
-        self.bookmarks[h_node_path] = bookmark
-        self.bookmark_view_layout.insertWidget(idx, bookmark)
-        
-        iterw = InterWidget(parent=self)
-        self.bookmark_view_layout.addWidget(iterw)
+        try:
+            while self.current < count:
+
+                i = self.current
+                bkm = self.bookmarks[i]
+                self.current += 1
+
+                node = None
+                if bkm.get("type") == "bookmark":
+                    node, node_path = NodeResolver.resolve_entry(bkm, describe_node,
+                                                                 hou.nodeBySessionId,
+                                                                 hou.node)
+                    if node is None:
+                        self.pending.append(i)
+                        self.matcher.add_entry(i, bkm)
+                    else:
+                        self.resolution.add(i, node, bkm.get("node_path"), node_path)
 
-        self.refresh_bookmark_ids()
-        self.bookmark_view_layout.update()
-        self.update()
+                if node is not None or bkm.get("type") != "bookmark":
+                    record = resolve_bookmark_record(bkm, node)
+                    if record is not None:
+                        records.append(record)
+                        self.inserted.append(i)
 
-    def insert_separator(self, idx=0):
-        
-        r, breaker_name = hou.ui.readInput("Enter a name:",
-                                            initial_contents="Separator",
-                                            buttons=["Ok", "Cancel"])
-        if r == 1: return
+                if time.time() > deadline:
+                    break
 
-        b = Separator(breaker_name, idx, parent=self)
-        self.bookmark_view_layout.insertWidget(idx, b)
-        _idx = self.bookmark_view_layout.indexOf(b)
-        self.bookmark_view_layout.insertWidget(_idx, InterWidget(self))
+        finally:
+            # the slice is inserted as one block, views refresh once
+            self.store.insert_many(records)
 
-        self.refresh_bookmark_ids()
+        if self.current < count:
+            return
 
-    def refresh_bookmark_ids(self):
+        if len(self.matcher):
+            self.scene = walk_scene_nodes()
+        else:
+            self.finish_resolution()
 
-        c = self.bookmark_view_layout.count()
-        for i in range(c):
-            it = self.bookmark_view_layout.itemAt(i)
-            if it:
-                w = it.widget()
+    def scan_scene(self, deadline):
 
-                if w:
-                    w.id = i
+        names = self.matcher.names
+        for n in self.scene:
+            if n.name() in names:
+                self.matcher.add_node(n)
+            if time.time() > deadline:
+                return
 
-    def get_linked_network(self):
+        self.scene = None
+        for i in self.matcher.match(self.resolution):
+            try:
+                record = resolve_bookmark_record(self.bookmarks[i],
+                                                 self.resolution.node(i))
+            except hou.ObjectWasDeleted:
+                continue
+            if record is None: continue
 
-        return self.nodeBookmarks.linked_network_views
+            position = self.base + bisect.bisect(self.inserted, i)
+            bisect.insort(self.inserted, i)
+            self.store.insert(record, min(position, len(self.store)))
 
-    def get_bookmark(self, node_path):
+        self.finish_resolution()
 
-        h_node_path = hashlib.sha1(node_path.encode("utf-8"))
-        h_node_path = h_node_path.hexdigest()
+    def finish_resolution(self):
 
-        return self.bookmarks.get(h_node_path)
+        self.resolution.finish(self.pending)
+
+        for i, saved_path in self.resolution.remapped:
+            print("Bookmark '{}' remapped from '{}' to '{}'".format(self.bookmarks[i].get("name"),
+                                                                  saved_path,
+                                                                  self.resolution.paths[i]))
+        # reported as skipped
+        for i in self.resolution.missing:
+            resolve_bookmark_record(self.bookmarks[i])
 
-    def get_data(self):
-        
-        data = []
-        
-        c = self.bookmark_view_layout.count()
-        for i in range(c):
-            it = self.bookmark_view_layout.itemAt(i)
-            if it:
-                w = it.widget()
-                if hasattr(w, "data"):
-                    data.append(w.data())
-        
-        return data
-        
 class NodesBookmark(QtWidgets.QMainWindow):
 
     def __init__(self):
@@ -1641,7 +3233,24 @@ class NodesBookmark(QtWidgets.QMainWindow):
 
         self.statusBar = QtWidgets.QStatusBar()
         self.setStatusBar(self.statusBar)
-        
+
+        # progressive loading of large bookmarks sets
+        self.loader = None
+        self.load_progress = QtWidgets.QProgressBar()
+        self.load_progress.setFormat("Loading bookmarks %v / %m")
+        self.load_progress.setMaximumHeight(14)
+        self.load_progress.setVisible(False)
+        self.statusBar.addPermanentWidget(self.load_progress)
+
+        self.cancel_load_btn = QtWidgets.QPushButton("")
+        self.cancel_load_btn.setFlat(True)
+        self.cancel_load_btn.setIcon(get_icon("close"))
+        self.cancel_load_btn.setFixedSize(QtCore.QSize(16, 16))
+        self.cancel_load_btn.setToolTip("Cancel loading")
+        self.cancel_load_btn.clicked.connect(self.cancel_loading)
+        self.cancel_load_btn.setVisible(False)
+        self.statusBar.addPermanentWidget(self.cancel_load_btn)
+
         cw = QtWidgets.QWidget()
 
         self.setProperty("houdiniStyle", True)
@@ -1667,9 +3276,9 @@ class NodesBookmark(QtWidgets.QMainWindow):
         open_act.triggered.connect(self.open_bookmarks)
         main_menu.addAction(open_act)
         
-        # recent menu
-        self.recent_files = []
+        # recent menu, built from the in memory recents when shown
         self.recents_menu = QtWidgets.QMenu("   Open Recent", self)
+        self.recents_menu.aboutToShow.connect(self.update_recents)
         main_menu.addMenu(self.recents_menu)
 
         main_menu.addSeparator()
@@ -1755,6 +3364,15 @@ class NodesBookmark(QtWidgets.QMainWindow):
 
         options_menu.addAction(self.auto_del_bkm_act)
 
+        self.virtualized_view_act = QtWidgets.QAction("   Virtualized list view", self)
+        self.virtualized_view_act.setCheckable(True)
+        self.virtualized_view_act.setChecked(ConfigFile.get_ui_prefs("virtualized_view"))
+        self.virtualized_view_act.setToolTip(("Paint only the visible bookmarks, "
+                                              "faster with large bookmark sets"))
+        self.virtualized_view_act.triggered.connect(lambda: self.update_opts("virtualized_view"))
+
+        options_menu.addAction(self.virtualized_view_act)
+
         options_menu.addSeparator()
 
         self.auto_save_act = QtWidgets.QAction("   Auto save bookmarks to hip", self)
@@ -1764,6 +3382,24 @@ class NodesBookmark(QtWidgets.QMainWindow):
         
         options_menu.addAction(self.auto_save_act)
 
+        self.compact_files_act = QtWidgets.QAction("   Save compact bookmark files", self)
+        self.compact_files_act.setCheckable(True)
+        self.compact_files_act.setChecked(ConfigFile.get_ui_prefs("compact_bkm_files"))
+        self.compact_files_act.setToolTip(("Save .bkm files without indentation, "
+                                           "smaller and faster to write"))
+        self.compact_files_act.triggered.connect(lambda: self.update_opts("compact_bkm_files"))
+
+        options_menu.addAction(self.compact_files_act)
+
+        self.watch_file_act = QtWidgets.QAction("   Watch opened bookmark file", self)
+        self.watch_file_act.setCheckable(True)
+        self.watch_file_act.setChecked(ConfigFile.get_ui_prefs("watch_bkm_files"))
+        self.watch_file_act.setToolTip(("Apply the changes made to the opened .bkm "
+                                        "file by other programs"))
+        self.watch_file_act.triggered.connect(lambda: self.update_opts("watch_bkm_files"))
+
+        options_menu.addAction(self.watch_file_act)
+
         menu_bar.addMenu(options_menu)
 
         # help menu
@@ -1873,25 +3509,40 @@ class NodesBookmark(QtWidgets.QMainWindow):
         self.filter_btn.setVisible(ConfigFile.get_ui_prefs("display_filter"))
         filter_layout.addWidget(self.filter_btn)
 
+        self.filter_match = FilterEngine.TEXT
+        self.filter_match_cb = QtWidgets.QComboBox()
+        for label, match in (("Text", FilterEngine.TEXT),
+                             ("Fuzzy", FilterEngine.FUZZY),
+                             ("Regex", FilterEngine.REGEX)):
+            self.filter_match_cb.addItem(label, match)
+        self.filter_match_cb.setToolTip(("Text: names containing the filter\n"
+                                         "Fuzzy: names containing the filter's characters"
+                                         " in order, best match first\n"
+                                         "Regex: names matching the regular expression"))
+        self.filter_match_cb.currentIndexChanged.connect(self.update_filter_match)
+        self.filter_match_cb.setVisible(ConfigFile.get_ui_prefs("display_filter"))
+        filter_layout.addWidget(self.filter_match_cb)
+
+        # filter is updated once the typing pauses
+        self.filter_timer = QtCore.QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.timeout.connect(self.update_filter)
+
         self.filter_input = QtWidgets.QLineEdit()
         self.filter_input.setVisible(ConfigFile.get_ui_prefs("display_filter"))
-        self.filter_input.textChanged.connect(self.update_filter)
+        self.filter_input.textChanged.connect(lambda: self.filter_timer.start(FILTER_DELAY))
 
         filter_layout.addWidget(self.filter_input)
 
         main_layout.addLayout(filter_layout)
 
-        # scroll area ( where bookmark are added )
-        scroll_area = QtWidgets.QScrollArea()
-        scroll_area.setStyleSheet("background-color: transparent")
-        scroll_area.setWidgetResizable(True)
-
-        self.bookmark_view = BookmarkView(self)
-        scroll_area.setWidget(self.bookmark_view)
-        main_layout.addWidget(scroll_area)
-
-        # link bookmark view to add separator button
-        self.add_separator_btn.bookmark_view = self.bookmark_view
+        # bookmarks view, widgets in a scroll area or virtualized list
+        self.bookmark_view = None
+        self.filter_engine = SharedFilter
+        self.view_layout = QtWidgets.QVBoxLayout()
+        self.view_layout.setContentsMargins(0,0,0,0)
+        main_layout.addLayout(self.view_layout)
+        self.create_bookmark_view()
 
         # network link
         network_link_layout = QtWidgets.QHBoxLayout()
@@ -1917,16 +3568,87 @@ class NodesBookmark(QtWidgets.QMainWindow):
         self.setCentralWidget(cw)
 
         self.init_network_linked()
-        self.update_recents()
+        Recents.load()
+
+        # opened .bkm file, reloaded once its changes settle if watched
+        self.bkm_file = None
+        self.file_watcher = QtCore.QFileSystemWatcher(self)
+        self.file_watcher.fileChanged.connect(lambda path: self.watch_timer.start(WATCH_DELAY))
+        self.watch_timer = QtCore.QTimer(self)
+        self.watch_timer.setSingleShot(True)
+        self.watch_timer.timeout.connect(self.reload_watched_file)
+
+        # recover the journal of a crashed session or load the data saved
+        # in the hip file, only done by the first panel, the others share
+        # its store
+        self.recovered_journal = False
+        if not len(SharedStore):
+            if not self.recover_journal():
+                self.check_hip_file_data()
+
+        self.start_journal()
+
+    def create_bookmark_view(self):
+        """ Create the bookmark view according to the "virtualized_view"
+            pref, the view renders the store shared by all the panels.
+        """
+
+        store = SharedStore
+        if self.bookmark_view is not None:
+            self.bookmark_view.release()
+
+            it = self.view_layout.takeAt(0)
+            if it and it.widget():
+                it.widget().setParent(None)
+                it.widget().deleteLater()
+
+        if ConfigFile.get_ui_prefs("virtualized_view"):
+            self.bookmark_view = BookmarkListView(self, store=store)
+            self.view_layout.addWidget(self.bookmark_view)
+
+        else:
+            # scroll area ( where bookmark are added )
+            scroll_area = QtWidgets.QScrollArea()
+            scroll_area.setStyleSheet("background-color: transparent")
+            scroll_area.setWidgetResizable(True)
+
+            self.bookmark_view = BookmarkView(self, store=store)
+            scroll_area.setWidget(self.bookmark_view)
+            self.view_layout.addWidget(scroll_area)
+
+        # link bookmark view to add separator button
+        self.add_separator_btn.bookmark_view = self.bookmark_view
+
+        self.update_filter()
+
+    def release(self):
+        """ Called when the panel is closed, the shared store is kept.
+        """
+
+        # pending hip data is written while the panel can still give its
+        # options, the last panel closed would drop it otherwise
+        try:
+            HipData.flush()
+        except RuntimeError:
+            pass
 
-        # check if any data are saved in the hip file and load them
-        self.check_hip_file_data()
+        # the views only use python objects and hou, they are released
+        # first as the Qt objects may already be deleted
+        LivePanels.unregister(self)
+        if self.bookmark_view is not None:
+            self.bookmark_view.release()
+            self.bookmark_view = None
+
+        self.bkm_file = None
+        self.cancel_loading()
+        self.watch_timer.stop()
 
     def update_filter_mode(self):
         
         if self.filter_mode == "bookmark":
-            self.filter_btn.setIcon(hou.ui.createQtIcon("SOP_subnet"))
-            self.filter_btn.setToolTip("Filter by node's name.")
+            self.filter_btn.setIcon(get_houdini_icon("SOP_subnet"))
+            self.filter_btn.setToolTip(("Filter by node's name and type, or by "
+                                        "node's path if the filter contains a '/'."))
             self.filter_mode = "node"
         else:
             self.filter_btn.setIcon(get_icon("book"))
@@ -1935,10 +3657,33 @@ class NodesBookmark(QtWidgets.QMainWindow):
 
         self.update_filter()
 
+    def update_filter_match(self, idx):
+
+        self.filter_match = self.filter_match_cb.itemData(idx)
+        self.update_filter()
+
     def update_filter(self):
 
-        self.bookmark_view.update_filter(self.filter_input.text(),
-                                         self.filter_mode)
+        self.filter_timer.stop()
+
+        try:
+            keys = self.filter_engine.filter(self.filter_input.text(),
+                                             self.filter_mode,
+                                             self.filter_match)
+        except re.error as e:
+            self.statusBar.showMessage("Invalid regular expression: " + str(e),
+                                       2500)
+            return
+
+        if keys is None:
+            self.bookmark_view.apply_filter(None)
+            return
+
+        self.bookmark_view.apply_filter(set(keys))
+
+        # fuzzy matches are ranked, show the best one
+        if keys and self.filter_match == FilterEngine.FUZZY:
+            self.bookmark_view.scroll_to_record(keys[0])
 
     def select_link(self):
 
@@ -1948,20 +3693,11 @@ class NodesBookmark(QtWidgets.QMainWindow):
 
     def get_bookmarks(self):
 
-        bookmarks = []
-        for i in range(self.bookmark_view.bookmark_view_layout.count()):
-            it = self.bookmark_view.bookmark_view_layout.itemAt(i)
-            if not it: continue
-            w = it.widget()
-            if not w: continue
-            if hasattr(w, "bookmark_name"):
-                bookmarks.append(w)
-
-        return bookmarks
+        return self.bookmark_view.store.bookmarks()
 
     def get_bookmark_file_data(self, verbose=False):
 
-        if self.bookmark_view.bookmarks == {}:
+        if not SharedStore.has_bookmarks():
             if verbose:
                 hou.ui.displayMessage("Bookmark list is empty.")
             return None
@@ -1972,7 +3708,7 @@ class NodesBookmark(QtWidgets.QMainWindow):
         bookmark_data["linked_networks"] = [ntw.name() for ntw in \
                                             self.linked_network_views]
 
-        bookmark_data["bookmark_data"] = self.bookmark_view.get_data()
+        bookmark_data["bookmark_data"] = SharedStore.data()
 
         bookmark_data["options"] = {"show_icons":self.show_icon_btn.isChecked(),
                                     "show_labels":self.show_label_btn.isChecked(),
@@ -1984,48 +3720,28 @@ class NodesBookmark(QtWidgets.QMainWindow):
     def update_icon(self):
 
         state = self.show_icon_btn.isChecked()
-        for w in self.get_bookmarks():
-            
-            if state:
-                w.icon_lbl.show()
-            else:
-                w.icon_lbl.hide()
+        self.bookmark_view.set_display_option("show_icon", state)
 
         self.update_display_options("show_icon")
 
     def update_label(self):
 
         state = self.show_label_btn.isChecked()
-        for w in self.get_bookmarks():
-            
-            if state:
-                w.label.show()
-            else:
-                w.label.hide()
+        self.bookmark_view.set_display_option("show_label", state)
 
         self.update_display_options("show_label")
 
     def update_type(self):
 
         state = self.show_type_btn.isChecked()
-        for w in self.get_bookmarks():
-            
-            if state:
-                w.type_name_label.show()
-            else:
-                w.type_name_label.hide()
+        self.bookmark_view.set_display_option("show_type", state)
 
         self.update_display_options("show_type")
 
     def update_flags(self):
 
         state = self.show_flags_btn.isChecked()
-        for w in self.get_bookmarks():
-
-            if state:
-                w.node_flags.show()
-            else:
-                w.node_flags.hide()
+        self.bookmark_view.set_display_option("show_flags", state)
         
         self.update_display_options("show_flags")
 
@@ -2051,89 +3767,105 @@ class NodesBookmark(QtWidgets.QMainWindow):
         self.link_labels.setText(inf)
         self.link_labels.setToolTip(", ".join([e.name() for e in editors]))
 
-    def refresh_bookmark_paths(self, parent_path=None,
-                               created_child_path=None,
-                               parent_being_deleted=False):
-
-        for i in range(self.bookmark_view.bookmark_view_layout.count()):
-            it = self.bookmark_view.bookmark_view_layout.itemAt(i)
-            if it:
-                w = it.widget()
-                if w:
-                    if hasattr(w, "node_session_id"):
-
-                        if parent_being_deleted:
-
-                            if not hou.node(w.node_path):
-                                if ConfigFile.get_ui_prefs("auto_delete_bookmark"):
-                                    w.remove_me()
-                                else:
-                                    w.set_disabled()
-
-                        elif parent_path is not None and \
-                           created_child_path is not None:
-
-                            cur_node_path = w.node_path
+    def apply_node_events(self, events, stats=None):
+        """ Refresh the bookmarks from a merged node events batch, the hip
+            file is saved only once for the whole batch. The shared store
+            is updated once, the views of all the panels are refreshed.
+        """
+
+        for kind, parent_path, child_paths in events:
+
+            if kind == PARENT_DELETED:
+                self.refresh_bookmark_paths(parent_path=parent_path,
+                                            parent_being_deleted=True,
+                                            skip_save_hip=True)
+            elif kind == CHILD_CREATED:
+                self.refresh_bookmark_paths(parent_path=parent_path,
+                                            created_child_path=child_paths,
+                                            skip_save_hip=True)
+            else:
+                self.refresh_bookmark_paths(skip_save_hip=True)
 
-                            if not cur_node_path.startswith(parent_path):
-                                continue
+        self.auto_save_to_hip()
 
-                            cur_node_path = cur_node_path.replace(parent_path, "")
+        if stats and stats["coalesced"] > 0:
+            msg = "{} node events processed, {} coalesced".format(stats["received"],
+                                                                  stats["coalesced"])
+            self.statusBar.showMessage(msg, 2500)
 
-                            data = cur_node_path.split('/')
-                            if len(data) >= 2:
-                                created_child = data[1]
-                            else:
-                                try:
-                                    created_child = data[0]
-                                except IndexError:
-                                    created_child = ""
+    def refresh_bookmark_paths(self, parent_path=None,
+                               created_child_path=None,
+                               parent_being_deleted=False,
+                               skip_save_hip=False):
+        """ created_child_path can be a single path or a list of the
+            children paths created under parent_path.
+        """
+
+        view = self.bookmark_view
+        views = [p.bookmark_view for p in get_bookmarks_panels() \
+                 if p.bookmark_view is not None] or [view]
+
+        # only the bookmarks under the parent's subtree can be affected
+        if parent_path is not None:
+            records = view.store.find_under_path(parent_path)
+        else:
+            records = view.store.bookmarks()
 
-                            created_child = created_child_path + '/' + created_child
-                            cur_node_path = created_child_path + cur_node_path
-                            cur_node = hou.node(cur_node_path)
+        if isinstance(created_child_path, (list, tuple)):
+            created_child_paths = created_child_path
+        elif created_child_path is not None:
+            created_child_paths = [created_child_path]
+        else:
+            created_child_paths = []
 
-                            created_child_node = hou.node(created_child)
+        deleted = []
+        for record in records:
 
-                            if created_child_node and (cur_node_path != created_child):
+            if parent_being_deleted:
 
-                                safe_apply_callback(created_child_node, (hou.nodeEventType.NameChanged,),
-                                                    refresh_bookmarks_callbacks_renamed)
+                if not hou.node(record.node_path):
+                    if ConfigFile.get_ui_prefs("auto_delete_bookmark"):
+                        deleted.append(record.key)
+                    else:
+                        for v in views:
+                            v.set_disabled(record.key)
 
-                                safe_apply_callback(created_child_node, (hou.nodeEventType.ChildCreated,),
-                                                    refresh_bookmark_callbacks_childcreated)
+            elif parent_path is not None and created_child_paths:
 
-                                safe_apply_callback(created_child_node, (hou.nodeEventType.BeingDeleted,),
-                                                    refresh_bookmark_callbacks_parent_deleted)
+                # node still where it was, it hasn't been moved
+                # under one of the created children
+                if record.session_id is not None:
+                    n = hou.nodeBySessionId(record.session_id)
+                    if n is not None and n.path() == record.node_path:
+                        continue
 
-                            if cur_node:
+                rel_node_path = record.node_path[len(parent_path):]
 
-                                w.refresh_session_id(cur_node)
-                                w.node_flags.node_path = cur_node_path
-                                w.node_flags.re_init_flags()
-                                
-                                child = hou.node(created_child_path)
+                for child_path in created_child_paths:
 
-                                safe_apply_callback(child, (hou.nodeEventType.NameChanged,),
-                                                    refresh_bookmarks_callbacks_renamed)
+                    cur_node = hou.node(child_path + rel_node_path)
+                    if cur_node:
 
-                                safe_apply_callback(child, (hou.nodeEventType.ChildCreated,),
-                                                    refresh_bookmark_callbacks_childcreated)
+                        # the new node's parents callbacks are added when
+                        # the bookmark starts watching it
+                        view.refresh_node_data(record.key, cur_node.sessionId(),
+                                               skip_save_hip=True)
+                        for v in views:
+                            v.refresh_flags(record.key)
+                        break
+                
+            else:
+                view.refresh_node_data(record.key, record.session_id,
+                                       skip_save_hip=True)
 
-                                safe_apply_callback(child, (hou.nodeEventType.BeingDeleted,),
-                                                    refresh_bookmark_callbacks_parent_deleted)
-                            
-                        else:
-                            w.refresh_node_data(w.node_session_id,
-                                                skip_save_hip=True)
+        view.remove_records(deleted)
 
-        auto_save = ConfigFile.get_ui_prefs("auto_save_to_hip")
-        if auto_save:
-            self.save_to_hip(verbose=False)
+        if not skip_save_hip:
+            self.auto_save_to_hip()
 
     def clear_bookmarks(self):
 
-        if self.bookmark_view.bookmarks == {}:
+        if not self.bookmark_view.store.has_bookmarks():
             return
 
         data = self.check_hip_file_data(load_data=False)
@@ -2162,20 +3894,11 @@ class NodesBookmark(QtWidgets.QMainWindow):
             else:
                 keep_hip = False
 
-        for i in range(self.bookmark_view.bookmark_view_layout.count())[::-1]:
-            it = self.bookmark_view.bookmark_view_layout.itemAt(i)
-            if it:
-                w = it.widget()
-                if w:
-                    w.setParent(None)
-                    if hasattr(w, "clean_node_callbacks"):
-                        w.clean_node_callbacks()
-                    w.deleteLater()
-
-        self.bookmark_view.bookmarks = {}
-        
-        self.bookmark_view.bookmark_view_layout.update()
-        self.bookmark_view.update()
+        global LoadedSource
+
+        self.cancel_loading()
+        self.bookmark_view.store.clear()
+        LoadedSource = None
         
         if not keep_hip:
             self.delete_hip_file_data(verbose=False)
@@ -2185,20 +3908,77 @@ class NodesBookmark(QtWidgets.QMainWindow):
         if bkm_file == "":
             bkm_file = QtWidgets.QFileDialog.getOpenFileName(self, "Select a file",
                                                         filter = "Bookmark (*.bkm)")[0]
-        else:
-            if not os.path.exists(bkm_file):
-                hou.ui.displayMessage("Invalid file: " + str(bkm_file),
-                                      severity=hou.severityType.Error)
-                return
 
         if bkm_file.strip() == '': return
 
-        with open(bkm_file) as f:    
-            data = json.load(f)
-        
-        self.set_bookmark_from_data(data)
+        # read and parsed by the worker, loaded once done
+        self.statusBar.showMessage("Reading " + bkm_file + " ...")
+        FileTasks.submit(FileIO.read_bookmarks, (bkm_file,),
+                         callback=lambda data, error, path=bkm_file: \
+                                  self.bookmarks_file_read(path, data, error))
+
+    def bookmarks_file_read(self, bkm_file, data, error):
+
+        # the panel was closed in the meantime
+        if self.bookmark_view is None:
+            return
+
+        self.statusBar.clearMessage()
+
+        if error is not None:
+            hou.ui.displayMessage("Invalid file: " + str(bkm_file) + "\n" + str(error),
+                                  severity=hou.severityType.Error)
+            return
+
+        if not self.set_bookmark_from_data(data, source=bkm_file):
+            return
+
+        Recents.add(bkm_file)
+        self.watch_file(bkm_file)
+
+    def watch_file(self, bkm_file):
+        """ Watch the opened .bkm file if the "watch_bkm_files" pref is on,
+            a file previously watched is released.
+        """
+
+        self.bkm_file = bkm_file
+
+        watched = self.file_watcher.files()
+        if watched:
+            self.file_watcher.removePaths(watched)
+
+        if bkm_file and ConfigFile.get_ui_prefs("watch_bkm_files"):
+            self.file_watcher.addPath(bkm_file)
+
+    def reload_watched_file(self):
+
+        if not self.bkm_file:
+            return
+
+        FileTasks.submit(FileIO.read_bookmarks, (self.bkm_file, True),
+                         callback=lambda data, error, path=self.bkm_file: \
+                                  self.watched_file_read(path, data, error))
+
+    def watched_file_read(self, bkm_file, data, error):
+
+        if self.bookmark_view is None or bkm_file != self.bkm_file or \
+           not ConfigFile.get_ui_prefs("watch_bkm_files"):
+            return
+
+        # files replaced by a rename are no longer watched
+        if not bkm_file in self.file_watcher.files():
+            self.file_watcher.addPath(bkm_file)
 
-        self.add_to_recents(bkm_file)
+        if error is not None:
+            # most likely written partially, it changes again once done
+            msg = os.path.basename(bkm_file) + " changed, invalid content ignored: " + str(error)
+            self.statusBar.showMessage(msg, 5000)
+            return
+
+        # the panel's own saves to this file don't change anything
+        self.reconcile_bookmarks(data["bookmark_data"],
+                                 source=os.path.basename(bkm_file) + " changed",
+                                 show_unchanged=False)
 
     def save_bookmarks(self):
         
@@ -2212,10 +3992,31 @@ class NodesBookmark(QtWidgets.QMainWindow):
         bookmark_data = self.get_bookmark_file_data()
         if not bookmark_data: return
 
-        with open(bkm, 'w') as f:
-            json.dump(bookmark_data, f,
-                      ensure_ascii=False,
-                      indent=4)
+        # serialized and written by the worker
+        FileTasks.submit(FileIO.write_bookmarks,
+                         (bkm, bookmark_data, ConfigFile.get_ui_prefs("compact_bkm_files")),
+                         callback=self.bookmarks_file_written)
+
+    def bookmarks_file_written(self, bkm_file, error):
+
+        if error is not None:
+            hou.ui.displayMessage("Can't save bookmarks file: " + str(error),
+                                  severity=hou.severityType.Error)
+            return
+
+        if self.bookmark_view is not None:
+            self.statusBar.showMessage("Bookmarks saved to " + bkm_file, 2500)
+
+    def auto_save_to_hip(self):
+        """ Flag the shared hip data as dirty if auto save is enabled, it
+            is saved at most once per auto save interval.
+        """
+
+        HipData.mark_dirty()
+
+    def flush_hip_data(self):
+
+        HipData.flush()
 
     def save_to_hip(self, verbose=True):
 
@@ -2227,37 +4028,94 @@ class NodesBookmark(QtWidgets.QMainWindow):
                                       buttons=["Yes", "Cancel"])
             if r == 1: return
 
-        self.delete_hip_file_data(verbose=False)
-
-        code = ("# HOUDINI NODE BOOKMARKS START\n"
-                "def get_node_bookmarks_data():\n"
-                "    return " + str(bookmark_data)+ "\n"
-                "# HOUDINI NODE BOOKMARKS END\n"
-                )
-
-        cur_data = hou.sessionModuleSource()
-        if cur_data == "\n" or cur_data == "":
-            hou.setSessionModuleSource(code)
-        else:
-            hou.setSessionModuleSource(cur_data + '\n' + code)
+        HipData.write(bookmark_data)
 
     def check_hip_file_data(self, verbose=False, load_data=True):
 
-        if hasattr(hou.session, "get_node_bookmarks_data"):
-            data = hou.session.get_node_bookmarks_data()
-            if load_data:
-                self.load_from_hip_data(data)
-            return data
-        else:
+        try:
+            data, is_legacy = HipStorage.read_data(hou.sessionModuleSource())
+        except HipStorage.HipDataError as e:
+            hou.ui.displayMessage("Invalid data: " + str(e),
+                                  severity=hou.severityType.Error)
+            return None
+
+        if data is None:
             if verbose:
                 hou.ui.displayMessage("No bookmarks data found in current hip file")
             return None
 
+        if not load_data:
+            return data
+
+        # only converted when loaded, saving writes the new format as well
+        if is_legacy:
+            print("Converting node bookmarks hip file data to the new format...")
+            source = HipStorage.write_data(hou.sessionModuleSource(), data)
+            hou.setSessionModuleSource(source)
+            remove_legacy_session_data()
+
+        self.load_from_hip_data(data)
+        return data
+
+    def start_journal(self):
+        """ Start the journal once the bookmarks are loaded, the one
+            restored by recover_journal is rewritten from them.
+        """
+
+        if BookmarkLog.active or \
+           (self.loader is not None and self.loader.running):
+            return
+
+        start_journal(recovered=self.recovered_journal)
+        self.recovered_journal = False
+
+    def recover_journal(self):
+        """ Replay the journal left by a session which didn't exit cleanly,
+            returns True if the bookmarks were restored from it.
+        """
+
+        path = get_journal_path()
+        if path is None or not os.path.exists(path):
+            return False
+
+        try:
+            snapshot, changes = Journal.read_journal(path)
+        except (IOError, OSError, ValueError) as e:
+            print("Can't read node bookmarks journal: " + str(e))
+            return False
+
+        r = hou.ui.displayMessage(("Unsaved bookmarks changes of a previous session "
+                                   "were found for this hip file, restore them ?"),
+                                  buttons=["Restore", "Discard"])
+        if r == 1:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print("Can't remove node bookmarks journal: " + str(e))
+            return False
+
+        global LoadedSource
+
+        print("Restoring node bookmarks from journal, {} change(s)...".format(len(changes)))
+        self.recovered_journal = True
+        entries = Journal.replay(snapshot, changes)
+        if not entries:
+            return True
+
+        # the journal has all the bookmarks of the hip, the ones of the
+        # previous hip still loaded are replaced
+        if len(SharedStore):
+            LoadedSource = None
+            self.reconcile_bookmarks(entries, source="Bookmarks restored")
+        else:
+            self.set_bookmark_from_data({"bookmark_data":entries})
+        return True
+
     def load_from_hip_data(self, data):
 
         try:
             print("Loading node bookmarks from hip file...")
-            self.set_bookmark_from_data(data)
+            self.set_bookmark_from_data(data, source=HIP_SOURCE)
         except Exception as e:
             hou.ui.displayMessage("Invalid data: " + str(e),
                                   severity=hou.severityType.Error)
@@ -2266,7 +4124,7 @@ class NodesBookmark(QtWidgets.QMainWindow):
     def delete_hip_file_data(self, verbose=True):
 
         data = hou.sessionModuleSource()
-        if data.strip() == "" or not "# HOUDINI NODE BOOKMARKS START" in data:
+        if not HipStorage.has_data(data):
             if verbose:
                 hou.ui.displayMessage("No bookmarks data found in current hip file")
             return
@@ -2276,121 +4134,153 @@ class NodesBookmark(QtWidgets.QMainWindow):
                                       buttons=["Yes", "Cancel"])
             if r == 1: return
 
+        try:
+            data = HipStorage.strip_data(data)
+        except HipStorage.HipDataError as e:
+            hou.ui.displayMessage("Can't delete bookmarks hip file data: " + str(e),
+                                  severity=hou.severityType.Error)
+            return
 
-        is_bkm_code = False
-        data = data.split('\n')
-        new_data = []
-        for d in data:
-
-            if d.startswith("# HOUDINI NODE BOOKMARKS START"):
-                is_bkm_code = True
-                continue
-
-            if d.startswith("# HOUDINI NODE BOOKMARKS END"):
-                is_bkm_code = False
-                continue
-
-            if not is_bkm_code:
-                new_data.append(d)
-
-        if new_data:
-            hou.setSessionModuleSource('\n'.join(new_data))
-        else:
-            hou.setSessionModuleSource('')
+        hou.setSessionModuleSource(data)
+        HipData.forget()
+        remove_legacy_session_data()
 
-        if hasattr(hou.session, "get_node_bookmarks_data"):
-            del(hou.session.get_node_bookmarks_data)
+    def set_bookmark_from_data(self, data, source=None):
+        """ Load the bookmarks data from source ( .bkm file path, HIP_SOURCE
+            or None ). If the same source is loaded already, only the
+            differences are applied, other data replaces or is appended
+            to the loaded bookmarks. Returns False if nothing was loaded.
+        """
 
-    def set_bookmark_from_data(self, data):
+        global LoadedSource
 
         bookmarks = data.get("bookmark_data")
         if not bookmarks:
             hou.ui.displayMessage(("Invalid file, 'bookmark_data' is empty"
                                    " or non-existent"))
-            return
+            return False
 
-        if self.bookmark_view.bookmark_view_layout.count() == 0:
-            self.bookmark_view.bookmark_view_layout.addWidget(InterWidget(self.bookmark_view))
+        if len(SharedStore):
 
-        for bkm in bookmarks:
-            
-            bkm_type = bkm.get("type")
+            if source is None or source != LoadedSource:
+                r = hou.ui.displayMessage("Replace the current bookmarks or append the new ones ?",
+                                          buttons=["Replace", "Append", "Cancel"])
+                if r == 2: return False
+                if r == 1:
+                    # the bookmarks now come from several sources
+                    LoadedSource = None
+                    self.start_loader(bookmarks)
+                    return True
 
-            if not bkm_type:
-                print("Invalid bkm, no type found")
-                continue
+            LoadedSource = source
+            self.reconcile_bookmarks(bookmarks)
+            return True
+
+        LoadedSource = source
+        self.start_loader(bookmarks)
+        return True
+
+    def start_loader(self, bookmarks):
+        """ Load the bookmarks by time slices, appended to the store.
+        """
+
+        self.cancel_loading()
+        if self.loader is not None:
+            self.loader.deleteLater()
 
-            if bkm_type == "bookmark":
+        self.loader = BookmarkLoader(bookmarks, self.bookmark_view.store,
+                                     parent=self)
+        self.loader.progress.connect(self.update_load_progress)
+        self.loader.finished.connect(self.loading_finished)
 
-                name=bkm.get("name", "INVALID")
-                node_path=bkm.get("node_path", "/obj")
-                node = hou.node(node_path)
-                if node is None:
-                    print("Node '{}' not found in scene,"
-                          " bookmark '{}' skipped".format(node_path,
-                                                          name))
-                    continue
+        self.load_progress.setRange(0, len(bookmarks))
+        self.load_progress.setValue(0)
+        self.loader.start()
 
-                b = Bookmark(name=name,
-                             node_path=node_path,
-                             node=node,
-                             color=bkm.get("color", [0,0,0]),
-                             text_color=bkm.get("text_color", [0,0,0]),
-                             session_id=bkm.get("session_id"),
-                             id=bkm.get("id", -1),
-                             uid=bkm.get("uid", "INVALID"),
-                             parent=self.bookmark_view)
+    def reconcile_bookmarks(self, bookmarks, source="Bookmarks reloaded",
+                            show_unchanged=True):
+        """ Make the loaded bookmarks match the given data entries, rows
+            are only added, removed, moved or updated where they differ.
+            The changes are shown in the status bar after source.
+        """
 
-                self.bookmark_view.bookmark_view_layout.addWidget(b)
-                self.bookmark_view.bookmarks[bkm.get("uid", "INVALID")] = b
+        self.cancel_loading()
 
-            elif bkm_type == "separator":
+        # bookmarks whose node isn't found keep their loaded record
+        records = []
+        unresolved = []
+        try:
+            resolution = resolve_bookmarks_data(bookmarks)
+            for i, bkm in enumerate(bookmarks):
+                node = resolution.node(i)
+                if node is None and bkm.get("type") == "bookmark":
+                    record = BookmarkRecord.from_data(bkm)
+                    if record is not None:
+                        unresolved.append(len(records))
+                else:
+                    record = resolve_bookmark_record(bkm, node)
+
+                if record is not None:
+                    records.append(record)
+        except Exception as e:
+            hou.ui.displayMessage("Invalid data: " + str(e),
+                                  severity=hou.severityType.Error)
+            return
+
+        stats = Reconciler.reconcile(SharedStore, records,
+                                     unresolved=unresolved)
 
-                s = Separator(bkm.get("name", "INVALID"),
-                              bkm.get("id", -1),
-                              parent=self.bookmark_view)
+        msg = (source + ": {inserted} added, {removed} removed, "
+               "{moved} moved, {updated} updated".format(**stats))
+        if resolution.missing:
+            msg += ", {} missing".format(len(resolution.missing))
 
-                self.bookmark_view.bookmark_view_layout.addWidget(s)
+        changed = any(stats.values())
+        if changed or show_unchanged:
+            self.statusBar.showMessage(msg, 5000)
 
-            self.bookmark_view.bookmark_view_layout.addWidget(InterWidget(self.bookmark_view))
+        if changed:
+            self.auto_save_to_hip()
 
-        self.bookmark_view.refresh_bookmark_ids()
-        self.bookmark_view.bookmark_view_layout.update()
-        self.bookmark_view.update()
+    def update_load_progress(self, current, count):
 
-    def get_recents(self):
+        self.load_progress.setValue(current)
 
-        if not os.path.exists(RECENTS_FILE):
-            with open(RECENTS_FILE, 'w') as f:
-                f.write("")
-            return []
+        # only shown if the loading doesn't fit in one slice
+        if current < count and not self.load_progress.isVisible():
+            self.load_progress.setVisible(True)
+            self.cancel_load_btn.setVisible(True)
 
-        with open(RECENTS_FILE, 'r') as f:
-            return [d for d in f.read().split('\n')\
-                    if d.strip() != ""]
+    def loading_finished(self, completed):
 
-    def add_to_recents(self, bkm):
+        self.load_progress.setVisible(False)
+        self.cancel_load_btn.setVisible(False)
 
-        cur_recents = self.get_recents()
-        if bkm in cur_recents: return
+        # the journal starts from the loaded bookmarks
+        self.start_journal()
 
-        if len(cur_recents) == 10:
-            cur_recents.pop(0)
+        if not completed:
+            msg = "Loading cancelled, {} / {} entries loaded".format(self.loader.current,
+                                                                    len(self.loader.bookmarks))
+            self.statusBar.showMessage(msg, 2500)
+            return
 
-        cur_recents.append(bkm)
-        with open(RECENTS_FILE, 'w') as f:
-            for cur in cur_recents:
-                f.write(cur + '\n')
+        resolution = self.loader.resolution
+        if resolution.remapped or resolution.missing:
+            msg = "{} bookmark(s) remapped, {} missing".format(len(resolution.remapped),
+                                                              len(resolution.missing))
+            self.statusBar.showMessage(msg, 5000)
 
-        self.recent_files = cur_recents
+    def cancel_loading(self):
 
-        self.update_recents()
+        if self.loader is not None:
+            self.loader.cancel()
 
     def update_recents(self):
 
         self.recents_menu.clear()
 
-        recents = self.get_recents()
+        recents = Recents.files()
         if recents == []:
             none_act = QtWidgets.QAction("None", self)
             none_act.setDisabled(True)
@@ -2407,14 +4297,9 @@ class NodesBookmark(QtWidgets.QMainWindow):
             del_rec_act.triggered.connect(self.delete_recent)
             self.recents_menu.addAction(del_rec_act)
 
-            self.recent_files = recents
-
     def delete_recent(self):
 
-        if os.path.exists(RECENTS_FILE):
-            os.remove(RECENTS_FILE)
-
-        self.update_recents()
+        Recents.clear()
 
     def update_opts(self, opt):
 
@@ -2428,6 +4313,15 @@ class NodesBookmark(QtWidgets.QMainWindow):
         elif opt == "auto_save_to_hip":
             val = str(self.auto_save_act.isChecked()).lower()
 
+        elif opt == "virtualized_view":
+            val = str(self.virtualized_view_act.isChecked()).lower()
+
+        elif opt == "compact_bkm_files":
+            val = str(self.compact_files_act.isChecked()).lower()
+
+        elif opt == "watch_bkm_files":
+            val = str(self.watch_file_act.isChecked()).lower()
+
         elif opt == "display_options":
 
             val = self.display_options_act.isChecked()
@@ -2447,12 +4341,19 @@ class NodesBookmark(QtWidgets.QMainWindow):
 
             self.filter_lbl.setVisible(val)
             self.filter_btn.setVisible(val)
+            self.filter_match_cb.setVisible(val)
             self.filter_input.setVisible(val)
 
             val = str(val).lower()
         
         ConfigFile.set_ui_prefs(opt, val)
 
+        if opt == "virtualized_view":
+            self.create_bookmark_view()
+
+        elif opt == "watch_bkm_files":
+            self.watch_file(self.bkm_file)
+
     def update_display_options(self, opt):
 
         if opt == "show_icon":
@@ -2474,7 +4375,8 @@ class NodesBookmark(QtWidgets.QMainWindow):
                                    "please select a node to add a bookmark"))
             return
 
-        self.bookmark_view.insert_bookmark(sel[0].path())
+        if self.bookmark_view.insert_bookmarks(sel):
+            self.auto_save_to_hip()
 
     def show_help(self):
 
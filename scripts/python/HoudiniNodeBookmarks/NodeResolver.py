@@ -0,0 +1,197 @@
+# MIT License
+#
+# Copyright (c) 2017-2020 Guillaume Jobst, www.cgtoolbox.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+""" Batch node resolution of bookmarks data entries.
+
+    Session ids are only valid in the Houdini session which saved them,
+    and paths change when nodes are moved or renamed. Entries are resolved
+    by session id, checked against the saved path or fingerprint, then by
+    path, then by fingerprint ( node type, parent type and node name )
+    against a single traversal of the scene.
+
+    Scene access is given as functions so it can be used outside of
+    Houdini.
+"""
+
+def make_fingerprint(type_name, parent_type_name, name):
+
+    return [type_name, parent_type_name, name]
+
+class ResolveResult(object):
+    """ nodes: entry index => node, for resolved and remapped entries.
+        paths: entry index => path of its node.
+        resolved: indexes of the entries found at their saved path.
+        remapped: ( index, saved path ) of the entries found elsewhere.
+        missing: indexes of the entries not found.
+    """
+
+    def __init__(self):
+
+        self.nodes = {}
+        self.paths = {}
+        self.resolved = []
+        self.remapped = []
+        self.missing = []
+
+    def __repr__(self):
+
+        return "<ResolveResult {} resolved, {} remapped, {} missing>".format(len(self.resolved),
+                                                                           len(self.remapped),
+                                                                           len(self.missing))
+
+    def node(self, index):
+
+        return self.nodes.get(index)
+
+    def finish(self, pending):
+        """ pending: indexes of the entries not found by session id or path.
+        """
+
+        self.remapped.sort()
+        self.missing = [i for i in pending if not i in self.nodes]
+
+    def add(self, index, node, saved_path, node_path):
+
+        self.nodes[index] = node
+        self.paths[index] = node_path
+        if node_path == saved_path:
+            self.resolved.append(index)
+        else:
+            self.remapped.append((index, saved_path))
+
+def resolve_entry(entry, describe, by_session_id, by_path):
+    """ Node of a bookmark entry by session id, checked against the saved
+        path or fingerprint, then by path. Returns ( node, node path ),
+        ( None, None ) if not found.
+    """
+
+    saved_path = entry.get("node_path")
+    fingerprint = entry.get("fingerprint")
+
+    # session ids are reused after a reload, the node must match
+    session_id = entry.get("session_id")
+    if session_id is not None:
+        n = by_session_id(session_id)
+        if n is not None:
+            p, f = describe(n)
+            if p == saved_path or (fingerprint and list(f) == list(fingerprint)):
+                return n, p
+
+    if saved_path:
+        n = by_path(saved_path)
+        if n is not None:
+            return n, saved_path
+
+    return None, None
+
+class FingerprintMatcher(object):
+    """ Matches the entries not found by session id or path with the scene
+        nodes of the same fingerprint. The scene nodes can be added in
+        several steps, only the ones named like an entry are needed.
+    """
+
+    def __init__(self, describe):
+
+        self.describe = describe
+        self.entries = {}
+        self.names = set()
+        self.candidates = {}
+
+    def __len__(self):
+
+        return len(self.entries)
+
+    def add_entry(self, index, entry):
+
+        fingerprint = entry.get("fingerprint")
+        if not fingerprint:
+            return
+
+        self.entries[index] = (tuple(fingerprint), entry.get("node_path"))
+        self.names.add(fingerprint[2])
+
+    def add_node(self, node):
+
+        p, f = self.describe(node)
+        self.candidates.setdefault(tuple(f), []).append((p, node))
+
+    def match(self, result):
+        """ Add the matching nodes to the ResolveResult, returns the
+            matched entry indexes in ascending order.
+        """
+
+        used = set(result.paths.values())
+        matched = []
+        for i in sorted(self.entries):
+            fingerprint, saved_path = self.entries[i]
+            found = [(p, n) for p, n in self.candidates.get(fingerprint, []) \
+                     if not p in used]
+            if len(found) != 1:
+                continue
+
+            p, n = found[0]
+            used.add(p)
+            result.add(i, n, saved_path, p)
+            matched.append(i)
+
+        return matched
+
+def resolve_entries(entries, describe, by_session_id, by_path, scene_nodes):
+    """ Resolve the nodes of the given bookmark entries ( .bkm / hip data
+        dicts, separators are skipped ) in one pass.
+
+        describe(node) => ( node path, fingerprint )
+        by_session_id(session_id) => node or None
+        by_path(node_path) => node or None
+        scene_nodes(names) => all the scene nodes named one of names, only
+                              called if some entries need it.
+
+        A fingerprint match is only used if it is not ambiguous, nodes
+        already used by another entry are not candidates. Nodes are
+        compared by path, the node objects may be new wrappers on every
+        call.
+    """
+
+    result = ResolveResult()
+    matcher = FingerprintMatcher(describe)
+    pending = []
+
+    for i, entry in enumerate(entries):
+        if entry.get("type") != "bookmark":
+            continue
+
+        node, node_path = resolve_entry(entry, describe, by_session_id, by_path)
+        if node is None:
+            pending.append(i)
+            matcher.add_entry(i, entry)
+            continue
+
+        result.add(i, node, entry.get("node_path"), node_path)
+
+    if len(matcher):
+        for n in scene_nodes(matcher.names):
+            matcher.add_node(n)
+        matcher.match(result)
+
+    result.finish(pending)
+    return result
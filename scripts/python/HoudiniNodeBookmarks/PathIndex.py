@@ -0,0 +1,134 @@
+# MIT License
+#
+# Copyright (c) 2017-2020 Guillaume Jobst, www.cgtoolbox.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+""" Node path prefix tree, used to find the bookmarks located under a
+    given node without scanning all of them.
+"""
+
+def split_path(node_path):
+
+    return [p for p in node_path.split('/') if p]
+
+class _TrieNode(object):
+
+    __slots__ = ("children", "values")
+
+    def __init__(self):
+
+        self.children = {}
+        self.values = set()
+
+class NodePathTrie(object):
+    """ Maps node paths to sets of values ( e.g. store record keys ),
+        one trie level per path component.
+    """
+
+    def __init__(self):
+
+        self._root = _TrieNode()
+        self._count = 0
+
+    def __len__(self):
+
+        return self._count
+
+    def _get(self, node_path):
+
+        n = self._root
+        for p in split_path(node_path):
+            n = n.children.get(p)
+            if n is None:
+                return None
+        return n
+
+    def add(self, node_path, value):
+
+        n = self._root
+        for p in split_path(node_path):
+            child = n.children.get(p)
+            if child is None:
+                child = _TrieNode()
+                n.children[p] = child
+            n = child
+
+        if not value in n.values:
+            n.values.add(value)
+            self._count += 1
+
+    def remove(self, node_path, value):
+
+        # keep the branch to prune empty nodes on the way back
+        branch = [(None, self._root)]
+        n = self._root
+        for p in split_path(node_path):
+            n = n.children.get(p)
+            if n is None:
+                return False
+            branch.append((p, n))
+
+        if not value in n.values:
+            return False
+
+        n.values.discard(value)
+        self._count -= 1
+
+        for i in range(len(branch) - 1, 0, -1):
+            p, n = branch[i]
+            if n.values or n.children:
+                break
+            del(branch[i - 1][1].children[p])
+
+        return True
+
+    def find(self, node_path):
+
+        n = self._get(node_path)
+        if n is None:
+            return set()
+        return set(n.values)
+
+    def descendants(self, node_path, include_self=False):
+        """ Values stored under the given path, only the matching
+            subtree is visited.
+        """
+
+        n = self._get(node_path)
+        if n is None:
+            return []
+
+        values = []
+        if include_self:
+            values.extend(n.values)
+
+        stack = list(n.children.values())
+        while stack:
+            n = stack.pop()
+            values.extend(n.values)
+            stack.extend(n.children.values())
+
+        return values
+
+    def clear(self):
+
+        self._root = _TrieNode()
+        self._count = 0
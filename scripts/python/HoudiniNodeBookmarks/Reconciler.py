@@ -0,0 +1,160 @@
+# MIT License
+#
+# Copyright (c) 2017-2020 Guillaume Jobst, www.cgtoolbox.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+""" Keyed reconciliation of a BookmarkStore with incoming records.
+
+    Reloading bookmarks data into a populated store only applies the
+    differences: records are matched by uid ( separators by name ), the
+    ones missing from the data are removed, the new ones inserted, the
+    others moved and updated only if needed. Records which keep their
+    relative order ( the longest increasing subsequence ) are not moved.
+    Records whose node isn't found in the scene keep their store record
+    as it is, they are not removed.
+"""
+
+from bisect import bisect_left
+
+UPDATED_FIELDS = ("name", "node_path", "session_id", "color",
+                  "text_color", "fingerprint")
+
+def record_match_keys(records):
+    """ Matching key of each record: uid for bookmarks, name for
+        separators, with the occurrence number of duplicates.
+    """
+
+    seen = {}
+    keys = []
+    for r in records:
+        k = ("separator", r.name) if r.is_separator else ("bookmark", r.uid)
+        n = seen.get(k, 0)
+        seen[k] = n + 1
+        keys.append(k + (n,))
+    return keys
+
+def longest_increasing_subsequence(values):
+    """ Indexes of a longest strictly increasing subsequence of values.
+    """
+
+    tails = []      # smallest tail value of the subsequences of each length
+    tails_idx = []
+    previous = [-1] * len(values)
+
+    for i, v in enumerate(values):
+        j = bisect_left(tails, v)
+        if j == len(tails):
+            tails.append(v)
+            tails_idx.append(i)
+        else:
+            tails[j] = v
+            tails_idx[j] = i
+        previous[i] = tails_idx[j - 1] if j > 0 else -1
+
+    result = []
+    i = tails_idx[-1] if tails_idx else -1
+    while i != -1:
+        result.append(i)
+        i = previous[i]
+    result.reverse()
+    return result
+
+def reconcile(store, records, unresolved=()):
+    """ Make the store match the given records ( in order, keys not set )
+        with the fewest changes. Returns the number of inserted, removed,
+        moved and updated records as a dict.
+
+        unresolved: indexes of the records whose node wasn't found, their
+        matching store records are kept unchanged, they are dropped if
+        there is none.
+    """
+
+    stats = {"inserted":0, "removed":0, "moved":0, "updated":0}
+
+    current = [store.get(k) for k in store.keys()]
+    current_keys = dict(zip(record_match_keys(current), current))
+    incoming_keys = record_match_keys(records)
+
+    unresolved = set(unresolved)
+    if unresolved:
+        kept = [i for i in range(len(records)) \
+                if not i in unresolved or incoming_keys[i] in current_keys]
+        records = [records[i] for i in kept]
+        incoming_keys = [incoming_keys[i] for i in kept]
+        unresolved = set(j for j, i in enumerate(kept) if i in unresolved)
+
+    # records not in the data
+    incoming_set = set(incoming_keys)
+    removed = [r.key for k, r in current_keys.items() if not k in incoming_set]
+    if removed:
+        store.remove_many(removed)
+        stats["removed"] = len(removed)
+
+    # incoming record => matching store record, None if new
+    matched = [current_keys.get(k) for k in incoming_keys]
+    matched = [r if r is not None and r.key in store else None for r in matched]
+
+    # matched records already in the right relative order stay in place
+    existing = [i for i, r in enumerate(matched) if r is not None]
+    positions = [store.index_of(matched[i].key) for i in existing]
+    staying = set(existing[i] for i in longest_increasing_subsequence(positions))
+
+    prev = None     # store key of the previous record, in the data order
+    new_records = []
+
+    def insert_pending(prev):
+
+        if not new_records:
+            return prev
+        position = 0 if prev is None else store.index_of(prev) + 1
+        store.insert_many(list(new_records), position)
+        stats["inserted"] += len(new_records)
+        prev = new_records[-1].key
+        del(new_records[:])
+        return prev
+
+    for i, incoming in enumerate(records):
+        r = matched[i]
+
+        if r is None:
+            new_records.append(incoming)
+            continue
+
+        prev = insert_pending(prev)
+
+        if not i in staying:
+            # placed right after the previous record of the data
+            slot = 0 if prev is None else store.index_of(prev) + 1
+            if store.index_of(r.key) != slot:
+                store.move(r.key, slot)
+                stats["moved"] += 1
+
+        if not i in unresolved:
+            fields = dict((f, getattr(incoming, f)) for f in UPDATED_FIELDS \
+                          if getattr(incoming, f) != getattr(r, f))
+            if fields and store.update(r.key, **fields):
+                stats["updated"] += 1
+
+        prev = r.key
+
+    insert_pending(prev)
+
+    return stats
@@ -0,0 +1,126 @@
+# MIT License
+#
+# Copyright (c) 2017-2020 Guillaume Jobst, www.cgtoolbox.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+""" Bookmark view style sheet.
+
+    The bookmark rows and flag buttons don't get their own style sheet,
+    they set dynamic properties matched by one style sheet applied on the
+    view. Each distinct (color, text_color) pair is interned once and gets
+    its rules, rows only hold the key of their pair.
+"""
+
+FLAG_OFF_COLORS = ("#4b4b4b", "#707070")
+
+FLAG_ON_COLORS = {"display":("#0489bc", "#00a5e4"),
+                  "template":("#dd7dd7", "#ff82f7"),
+                  "bypass":("#b6a642", "#cdba47")}
+
+DISABLED_COLOR = "rgb(20, 20, 20)"
+
+def _rgb(color):
+
+    return "rgb({0}, {1}, {2})".format(*color)
+
+def _base_rules():
+
+    rules = ["QLabel#nodeIcon{border: 0px}",
+
+             "QFrame#dropZone{background-color: transparent}",
+             "QFrame#dropZone[dropState=\"hover\"]{background-color: rgba(128,128,128,50)}",
+             "QFrame#dropZone[dropState=\"drag\"]{background-color: #626262}",
+
+             ("QPushButton[flagState=\"off\"]{{background-color: {0};"
+              " border: 1px solid black}}").format(FLAG_OFF_COLORS[0]),
+             ("QPushButton[flagState=\"off\"]:hover{{background-color: {0};"
+              " border: 1px solid black}}").format(FLAG_OFF_COLORS[1])]
+
+    for flag, (col, col_hov) in sorted(FLAG_ON_COLORS.items()):
+        sel = "QPushButton[nodeFlag=\"{0}\"][flagState=\"on\"]".format(flag)
+        rules.append(("{0}{{background-color: {1};"
+                      " border: 1px solid black}}").format(sel, col))
+        rules.append(("{0}:hover{{background-color: {1};"
+                      " border: 1px solid black}}").format(sel, col_hov))
+
+    return rules
+
+def color_rules(key, color, text_color):
+    """ Rules of a bookmark row using the given colors.
+    """
+
+    bg_hover_color = [c - 50 if c > 200 else c + 50 for c in color]
+    text_type_col = [c - 50 if c > 60 else c for c in text_color]
+
+    row = "QFrame[colorKey=\"{0}\"]".format(key)
+
+    return ("{0}, {0} QFrame{{background-color: {1}}}\n"
+            "{0}:hover, {0} QFrame:hover{{border: 1px solid {2}}}\n"
+            "{0} QLabel#nodeTypeName{{color: {3}; border: 0px;"
+            " background-color: transparent}}\n"
+            "{0} QLabel#bookmarkName{{color: {4}; border: 0px;"
+            " background-color: transparent; font-weight: bold}}"
+            ).format(row, _rgb(color), _rgb(bg_hover_color),
+                     _rgb(text_type_col), _rgb(text_color))
+
+def _disabled_rules():
+
+    row = "QFrame[disabledNode=\"true\"]"
+    return ["{0}, {0} QFrame{{background-color: {1}}}".format(row,
+                                                              DISABLED_COLOR)]
+
+class BookmarkStyleSheet(object):
+    """ Interned color pairs and the resulting style sheet, version is
+        incremented each time a new pair adds rules to the sheet.
+    """
+
+    def __init__(self):
+
+        self._pairs = {}
+        self._rules = []
+        self._sheet = None
+        self.version = 0
+
+    def __len__(self):
+
+        return len(self._pairs)
+
+    def color_key(self, color, text_color):
+
+        pair = (tuple(color), tuple(text_color))
+        key = self._pairs.get(pair)
+        if key is not None:
+            return key
+
+        key = "c{}".format(len(self._pairs))
+        self._pairs[pair] = key
+        self._rules.append(color_rules(key, color, text_color))
+        self._sheet = None
+        self.version += 1
+
+        return key
+
+    def style_sheet(self):
+
+        if self._sheet is None:
+            self._sheet = '\n'.join(_base_rules() + self._rules + \
+                                    _disabled_rules())
+        return self._sheet